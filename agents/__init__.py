@@ -3,11 +3,18 @@ CodeCollab Agents Package
 Strands-based multi-agent system for autonomous development
 """
 
-from .swarm_orchestrator import CodeCollabSwarm, CodeCollabSwarmTool
-
 __all__ = [
     'CodeCollabSwarm',
     'CodeCollabSwarmTool'
 ]
 
 __version__ = '2.0.0'  # Updated to reflect Swarm pattern implementation
+
+
+def __getattr__(name):
+    # Import the orchestrator (and the Strands stack behind it) on first
+    # access, so light submodules such as task_cache load without it
+    if name in __all__:
+        from . import swarm_orchestrator
+        return getattr(swarm_orchestrator, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,19 +5,49 @@ Following Strands Agents SDK patterns and best practices
 
 from strands import Agent, tool
 from strands.models import BedrockModel
+import asyncio
+import atexit
+import contextvars
 import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 import logging
-from typing import Optional, Dict, Any
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Dict, Any, Callable, Iterable, List, Tuple
 
 # Configure Strands logging as recommended
 logging.getLogger("strands").setLevel(logging.INFO)
-logging.basicConfig(
-    format="%(levelname)s | %(name)s | %(message)s",
-    handlers=[logging.StreamHandler()]
-)
+
+# Records are enqueued on the calling thread and written to stderr by a
+# single background listener, so concurrent agents never contend on the
+# stream lock. Like basicConfig, leave an already-configured root alone.
+if not logging.getLogger().handlers:
+    _log_queue = queue.SimpleQueue()
+    _stream_handler = logging.StreamHandler()
+    _stream_handler.setFormatter(logging.Formatter("%(levelname)s | %(name)s | %(message)s"))
+    _log_listener = QueueListener(_log_queue, _stream_handler)
+    logging.getLogger().addHandler(QueueHandler(_log_queue))
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
 
 logger = logging.getLogger(__name__)
 
+# Marker for "attribute not present" when probing result metrics
+_SENTINEL = object()
+
+
+@lru_cache(maxsize=8)
+def _cached_model(model_id: str, region: str, temperature: float, max_tokens: int) -> BedrockModel:
+    """Build one BedrockModel (and its boto3 client) per distinct configuration"""
+    return BedrockModel(
+        model_id=model_id,
+        region_name=region,
+        temperature=temperature,
+        max_tokens=max_tokens
+    )
+
 
 class BaseAgentConfig:
     """Base configuration for all CodeCollab agents following Strands patterns"""
@@ -34,12 +64,18 @@ class BaseAgentConfig:
 
     @staticmethod
     def create_model() -> BedrockModel:
-        """Create configured Bedrock model following Strands patterns"""
-        return BedrockModel(
-            model_id=BaseAgentConfig.MODEL_ID,
-            region_name=BaseAgentConfig.REGION,
-            temperature=BaseAgentConfig.TEMPERATURE,
-            max_tokens=BaseAgentConfig.MAX_TOKENS
+        """
+        Create configured Bedrock model following Strands patterns
+
+        The model holds no per-request state, so agents with the same
+        configuration share one instance instead of each paying for a
+        boto3 client and credential resolution.
+        """
+        return _cached_model(
+            BaseAgentConfig.MODEL_ID,
+            BaseAgentConfig.REGION,
+            BaseAgentConfig.TEMPERATURE,
+            BaseAgentConfig.MAX_TOKENS
         )
 
     @staticmethod
@@ -52,9 +88,49 @@ class BaseAgentConfig:
         )
 
 
+@dataclass(slots=True)
+class AgentResult:
+    """
+    Result of a single agent invocation
+
+    Supports result["tokens"]-style indexing for dict-based callers;
+    use to_dict() before JSON serialization.
+    """
+
+    message: Any
+    tokens: int
+    latency_ms: float
+    success: bool
+    agent_name: str
+    error: Optional[str] = None
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict form; "error" is only present for failed calls"""
+        data = {
+            "message": self.message,
+            "tokens": self.tokens,
+            "latency_ms": self.latency_ms,
+            "success": self.success,
+            "agent_name": self.agent_name
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
 class BaseCodeCollabAgent:
     """Base class for all CodeCollab agents"""
 
+    # Metric attribute names probed in order (differs across Strands versions)
+    _TOKEN_ATTRS = ("total_tokens", "token_count", "usage")
+    _LATENCY_ATTRS = ("total_latency_ms", "latency_ms", "latency")
+
     def __init__(self, name: str, system_prompt: str, tools: list = None):
         """
         Initialize base agent
@@ -76,63 +152,148 @@ class BaseCodeCollabAgent:
             tools=self.tools
         )
 
-        logger.info(f"Initialized {name} with {len(self.tools)} tools")
+        logger.info("Initialized %s with %d tools", name, len(self.tools))
 
-    def __call__(self, prompt: str) -> Dict[str, Any]:
+    def __call__(
+        self,
+        prompt: str,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> AgentResult:
         """
         Execute agent with given prompt
 
+        Synchronous shim around acall(). Inside a running event loop
+        (Jupyter, async handlers, tool callbacks) the call runs on a
+        worker thread with its own loop, as Strands' Agent.__call__ does;
+        use acall() directly from async code to avoid that thread.
+
         Args:
             prompt: User input/task description
+            on_token: Optional callback invoked with each text chunk as it streams
 
         Returns:
-            Dict containing:
+            AgentResult containing:
                 - message: Agent response
                 - tokens: Token usage
                 - latency_ms: Response time
                 - success: Boolean success indicator
         """
         try:
-            result = self.agent(prompt)
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.acall(prompt, on_token))
+
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(
+                context.run, asyncio.run, self.acall(prompt, on_token)
+            ).result()
+
+    async def acall(
+        self,
+        prompt: str,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> AgentResult:
+        """
+        Execute agent asynchronously with given prompt
+
+        Args:
+            prompt: User input/task description
+            on_token: Optional callback invoked with each text chunk as it streams
+
+        Returns:
+            Same AgentResult as __call__
+        """
+        try:
+            result = await self._consume_stream(prompt, on_token)
 
             # Extract metrics safely
             tokens = 0
             latency_ms = 0
 
-            if hasattr(result, 'metrics'):
+            metrics = getattr(result, 'metrics', None)
+            if metrics is not None:
                 # Try different attribute names for token count
-                if hasattr(result.metrics, 'total_tokens'):
-                    tokens = result.metrics.total_tokens
-                elif hasattr(result.metrics, 'token_count'):
-                    tokens = result.metrics.token_count
-                elif hasattr(result.metrics, 'usage'):
-                    tokens = result.metrics.usage.get('total_tokens', 0)
+                for name in self._TOKEN_ATTRS:
+                    value = getattr(metrics, name, _SENTINEL)
+                    if value is not _SENTINEL:
+                        tokens = value.get('total_tokens', 0) if name == 'usage' else value
+                        break
 
                 # Try different attribute names for latency
-                if hasattr(result.metrics, 'total_latency_ms'):
-                    latency_ms = result.metrics.total_latency_ms
-                elif hasattr(result.metrics, 'latency_ms'):
-                    latency_ms = result.metrics.latency_ms
-                elif hasattr(result.metrics, 'latency'):
-                    latency_ms = result.metrics.latency
-
-            return {
-                "message": result.message,
-                "tokens": tokens,
-                "latency_ms": latency_ms,
-                "success": True,
-                "agent_name": self.name
-            }
+                for name in self._LATENCY_ATTRS:
+                    value = getattr(metrics, name, _SENTINEL)
+                    if value is not _SENTINEL:
+                        latency_ms = value
+                        break
+
+            return AgentResult(
+                message=result.message,
+                tokens=tokens,
+                latency_ms=latency_ms,
+                success=True,
+                agent_name=self.name
+            )
         except Exception as e:
             logger.error(f"{self.name} execution failed: {e}")
-            return {
-                "message": f"Error in {self.name}: {str(e)}",
-                "tokens": 0,
-                "latency_ms": 0,
-                "success": False,
-                "agent_name": self.name,
-                "error": str(e)
-            }
+            return AgentResult(
+                message=f"Error in {self.name}: {str(e)}",
+                tokens=0,
+                latency_ms=0,
+                success=False,
+                agent_name=self.name,
+                error=str(e)
+            )
+
+    async def _consume_stream(
+        self,
+        prompt: str,
+        on_token: Optional[Callable[[str], None]]
+    ) -> Any:
+        """
+        Drive the agent's event stream, forwarding text chunks as they arrive
+
+        Returns:
+            The final AgentResult emitted at the end of the stream
+        """
+        result = None
+        async for event in self.agent.stream_async(prompt):
+            if "data" in event:
+                if on_token is not None:
+                    on_token(event["data"])
+            elif "result" in event:
+                result = event["result"]
+
+        if result is None:
+            raise RuntimeError("Agent stream ended without a result")
+        return result
+
+    @classmethod
+    async def run_many(
+        cls,
+        agents_and_prompts: Iterable[Tuple["BaseCodeCollabAgent", str]],
+        concurrency: int = 8
+    ) -> List[AgentResult]:
+        """
+        Run several independent agent calls concurrently
+
+        Args:
+            agents_and_prompts: (agent, prompt) pairs to execute; a Strands
+                Agent handles one request at a time, so list each agent once
+            concurrency: Maximum number of in-flight LLM requests
+
+        Returns:
+            AgentResults in the same order as the input pairs
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _run(agent: "BaseCodeCollabAgent", prompt: str) -> AgentResult:
+            async with semaphore:
+                return await agent.acall(prompt)
+
+        return await asyncio.gather(
+            *(_run(agent, prompt) for agent, prompt in agents_and_prompts)
+        )
 
     async def stream_async(self, prompt: str):
         """
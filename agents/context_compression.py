@@ -0,0 +1,88 @@
+"""
+Context compression for agent handoffs
+Keeps the high-signal parts of handoff context within a token budget
+"""
+
+from typing import Any, Dict
+import json
+
+# Rough characters-per-token ratio for English text and code; avoids
+# depending on a model-specific tokenizer
+CHARS_PER_TOKEN = 4
+
+# Default budget for one handoff context or upstream agent output
+DEFAULT_MAX_TOKENS = 4000
+
+# Keys downstream agents rely on, kept first and in this priority order
+HIGH_SIGNAL_KEYS = (
+    "requirements",
+    "implementation",
+    "tests",
+    "quality_score",
+    "status",
+    "codebase_context"
+)
+
+# Accumulated history that downstream agents do not need
+LOW_SIGNAL_KEYS = frozenset({"history", "messages", "conversation", "node_history", "transcript"})
+
+TRUNCATION_MARKER = "\n...[truncated]"
+
+
+def compress_text(text: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+    """
+    Truncate text to roughly max_tokens, marking the cut
+
+    Args:
+        text: Text to compress (e.g. an upstream agent's output)
+        max_tokens: Approximate token budget
+
+    Returns:
+        The text unchanged if it fits, otherwise its head plus a marker
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max(max_chars - len(TRUNCATION_MARKER), 0)] + TRUNCATION_MARKER
+
+
+def compress_context(ctx: Dict[str, Any], max_tokens: int = DEFAULT_MAX_TOKENS) -> Dict[str, Any]:
+    """
+    Compress handoff context to fit a token budget
+
+    High-signal keys (requirements, implementation, ...) are kept first,
+    other keys follow in their original order, and history-like keys are
+    dropped. A value that no longer fits is truncated to the remaining
+    budget (as text); anything after it is dropped.
+
+    Args:
+        ctx: Handoff context passed between agents
+        max_tokens: Approximate token budget for the whole context
+
+    Returns:
+        New context dict within the budget
+    """
+    budget = max_tokens * CHARS_PER_TOKEN
+    ordered_keys = [key for key in HIGH_SIGNAL_KEYS if key in ctx]
+    ordered_keys += [key for key in ctx if key not in HIGH_SIGNAL_KEYS and key not in LOW_SIGNAL_KEYS]
+
+    compressed = {}
+    for key in ordered_keys:
+        value = ctx[key]
+        text = _as_text(value)
+        if len(text) <= budget:
+            compressed[key] = value
+            budget -= len(text)
+        else:
+            if budget > len(TRUNCATION_MARKER):
+                compressed[key] = text[:budget - len(TRUNCATION_MARKER)] + TRUNCATION_MARKER
+            break
+
+    return compressed
+
+
+def _as_text(value: Any) -> str:
+    """Text form of a context value, as it would appear in a prompt"""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, default=str, ensure_ascii=False)
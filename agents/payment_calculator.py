@@ -3,51 +3,133 @@ Dynamic payment calculator for CodeCollab tasks
 Calculates micropayments based on complexity, quality, and execution time
 """
 
-from typing import Dict, Any
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, Mapping, Optional, Sequence, Tuple, Union
+import json
 import logging
+import math
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Tier thresholds (ascending) and the tier names they separate.
+# bisect_right(thresholds, x) indexes the tier, so each threshold is the
+# inclusive lower bound of the next tier.
+_QUALITY_THRESHOLDS = (70, 85, 95)
+_QUALITY_TIERS = ("needs_work", "acceptable", "good", "excellent")
+
+# "normal" includes exactly 120s, so "slow" starts just above it
+_TIME_THRESHOLDS = (30, 60, math.nextafter(120, math.inf))
+_TIME_TIERS = ("very_fast", "fast", "normal", "slow")
+
+# Formatted lazily by logging, only when INFO is enabled
+_PAYMENT_LOG_FORMAT = (
+    "Payment calculation: complexity=%s, quality=%s, time=%.1fs, tokens=%s, payment=$%.2f"
+)
+
+
+@dataclass(slots=True)
+class PaymentResult:
+    """
+    Payment amount with a breakdown that is only built when first accessed
+
+    Supports result["amount"] / result["breakdown"] indexing so dict-style
+    callers keep working; use to_dict() before JSON serialization.
+    """
+
+    amount: float
+    currency: str = "USD"
+    _context: Tuple[Any, ...] = field(default=(), repr=False)
+    _breakdown: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False)
+
+    @property
+    def breakdown(self) -> Dict[str, Any]:
+        """Detailed pricing breakdown (built on first access)"""
+        if self._breakdown is None:
+            (base_price, complexity, quality_score, quality_tier, quality_multiplier,
+             execution_time_sec, time_tier, time_multiplier, token_cost,
+             tokens_used, code_lines) = self._context
+            self._breakdown = {
+                "base_price": base_price,
+                "complexity": complexity,
+                "quality_score": quality_score,
+                "quality_tier": quality_tier,
+                "quality_multiplier": quality_multiplier,
+                "execution_time_sec": round(execution_time_sec, 2),
+                "time_tier": time_tier,
+                "time_multiplier": time_multiplier,
+                "token_cost": round(token_cost, 4),
+                "tokens_used": tokens_used,
+                "code_lines": code_lines
+            }
+        return self._breakdown
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in ("amount", "currency", "breakdown"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict form (amount, currency, breakdown)"""
+        return {
+            "amount": self.amount,
+            "currency": self.currency,
+            "breakdown": self.breakdown
+        }
+
 
 class PaymentCalculator:
     """Calculate dynamic micropayments for AI-completed coding tasks"""
 
+    # Pricing tables are read-only views: _PRICE_TABLE is derived from them
+    # at import time, so mutating them would silently desynchronize pricing
+
     # Base pricing by complexity (in dollars)
-    BASE_PRICING = {
+    BASE_PRICING: ClassVar[Mapping[str, float]] = MappingProxyType({
         "simple": 0.03,      # Simple algorithms, basic functions
         "medium": 0.08,      # Multi-function implementations, moderate logic
         "complex": 0.20,     # Complex architectures, multiple files
         "unknown": 0.05      # Default fallback
-    }
+    })
 
     # Quality multipliers (applied to base price)
-    QUALITY_MULTIPLIERS = {
+    QUALITY_MULTIPLIERS: ClassVar[Mapping[str, float]] = MappingProxyType({
         "excellent": 1.3,    # 95-100: +30% bonus
         "good": 1.15,        # 85-94: +15% bonus
         "acceptable": 1.0,   # 70-84: No adjustment
         "needs_work": 0.8    # <70: -20% (shouldn't happen with escalation)
-    }
+    })
 
     # Execution time bonuses (for fast completion)
-    TIME_BONUS = {
+    TIME_BONUS: ClassVar[Mapping[str, float]] = MappingProxyType({
         "very_fast": 1.1,    # <30s: +10% speed bonus
         "fast": 1.05,        # 30-60s: +5% bonus
         "normal": 1.0,       # 60-120s: No adjustment
         "slow": 0.95         # >120s: -5% (encourage optimization)
-    }
+    })
 
     # Token cost adjustment (approximate API costs)
-    TOKEN_COST_PER_1K = 0.0001  # $0.0001 per 1K tokens (rough estimate)
+    TOKEN_COST_PER_1K: ClassVar[float] = 0.0001  # $0.0001 per 1K tokens (rough estimate)
 
     @classmethod
     def calculate_payment(
         cls,
-        complexity: str = "unknown",
+        complexity: Optional[str] = "unknown",
         quality_score: int = 85,
         execution_time_ms: int = 0,
         tokens_used: int = 0,
         code_lines: int = 0
-    ) -> Dict[str, Any]:
+    ) -> PaymentResult:
         """
         Calculate dynamic micropayment for task completion
 
@@ -59,90 +141,109 @@ class PaymentCalculator:
             code_lines: Number of lines of code generated
 
         Returns:
-            Dict with payment amount and breakdown
+            PaymentResult with payment amount and breakdown
         """
         # Get base price by complexity
         complexity_lower = complexity.lower() if complexity else "unknown"
-        base_price = cls.BASE_PRICING.get(complexity_lower, cls.BASE_PRICING["unknown"])
+        price_key = complexity_lower if complexity_lower in cls.BASE_PRICING else "unknown"
+        execution_time_sec = max(execution_time_ms, 0) / 1000.0
 
-        # Get quality multiplier
-        quality_tier = cls._get_quality_tier(quality_score)
-        quality_multiplier = cls.QUALITY_MULTIPLIERS[quality_tier]
+        final_payment, quality_tier, time_tier, token_cost = _compute_amount(
+            price_key, quality_score, execution_time_sec, tokens_used
+        )
 
-        # Get time bonus/penalty
-        execution_time_sec = execution_time_ms / 1000.0 if execution_time_ms > 0 else 0
-        time_tier = cls._get_time_tier(execution_time_sec)
-        time_multiplier = cls.TIME_BONUS[time_tier]
+        logger.info(
+            _PAYMENT_LOG_FORMAT,
+            complexity, quality_score, execution_time_sec, tokens_used, final_payment
+        )
 
-        # Calculate token cost (actual API usage cost)
-        token_cost = (tokens_used / 1000.0) * cls.TOKEN_COST_PER_1K if tokens_used > 0 else 0
+        return PaymentResult(
+            final_payment,
+            "USD",
+            (
+                cls.BASE_PRICING[price_key], complexity_lower, quality_score,
+                quality_tier, cls.QUALITY_MULTIPLIERS[quality_tier],
+                execution_time_sec, time_tier, cls.TIME_BONUS[time_tier],
+                token_cost, tokens_used, code_lines
+            )
+        )
 
-        # Calculate final payment
-        # Formula: (base_price × quality × time) + token_cost
-        adjusted_price = base_price * quality_multiplier * time_multiplier
-        final_payment = adjusted_price + token_cost
+    @classmethod
+    def calculate_batch(
+        cls,
+        complexities: Sequence[str],
+        quality_scores: Sequence[int],
+        execution_times_ms: Sequence[int],
+        tokens_used: Sequence[int]
+    ) -> "np.ndarray":
+        """
+        Calculate payment amounts for many tasks at once (requires numpy)
 
-        # Round to nearest cent
-        final_payment = round(final_payment, 2)
+        Vectorized equivalent of calculate_payment()["amount"] for bulk
+        scoring such as ledger re-pricing or pricing simulations.
 
-        # Minimum payment of $0.01
-        final_payment = max(0.01, final_payment)
+        Args:
+            complexities: Task complexity per task (simple/medium/complex)
+            quality_scores: Quality score 0-100 per task
+            execution_times_ms: Execution time in milliseconds per task
+            tokens_used: Total tokens used per task
 
-        logger.info(
-            f"Payment calculation: complexity={complexity}, quality={quality_score}, "
-            f"time={execution_time_sec:.1f}s, tokens={tokens_used}, "
-            f"payment=${final_payment:.2f}"
+        Returns:
+            numpy float array of payment amounts, one per task
+        """
+        import numpy as np
+
+        price_keys = tuple(cls.BASE_PRICING)
+        key_index = {key: i for i, key in enumerate(price_keys)}
+        unknown_index = key_index["unknown"]
+        complexity_index = np.fromiter(
+            (key_index.get(c.lower() if c else "unknown", unknown_index) for c in complexities),
+            dtype=np.intp,
+            count=len(complexities)
         )
 
-        return {
-            "amount": final_payment,
-            "currency": "USD",
-            "breakdown": {
-                "base_price": base_price,
-                "complexity": complexity_lower,
-                "quality_score": quality_score,
-                "quality_tier": quality_tier,
-                "quality_multiplier": quality_multiplier,
-                "execution_time_sec": round(execution_time_sec, 2),
-                "time_tier": time_tier,
-                "time_multiplier": time_multiplier,
-                "token_cost": round(token_cost, 4),
-                "tokens_used": tokens_used,
-                "code_lines": code_lines
-            }
-        }
+        base_prices = np.array([cls.BASE_PRICING[key] for key in price_keys])
+        quality_multipliers = np.array([cls.QUALITY_MULTIPLIERS[tier] for tier in _QUALITY_TIERS])
+        time_multipliers = np.array([cls.TIME_BONUS[tier] for tier in _TIME_TIERS])
+
+        execution_time_sec = np.maximum(np.asarray(execution_times_ms, dtype=float), 0.0) / 1000.0
+        tokens = np.maximum(np.asarray(tokens_used, dtype=float), 0.0)
+        token_cost = (tokens / 1000.0) * cls.TOKEN_COST_PER_1K
+
+        adjusted_price = (
+            base_prices[complexity_index]
+            * quality_multipliers[np.digitize(quality_scores, _QUALITY_THRESHOLDS)]
+            * time_multipliers[np.digitize(execution_time_sec, _TIME_THRESHOLDS)]
+        )
+        amounts = adjusted_price + token_cost
+
+        # np.round scales by 100 before rounding, which misrounds values that
+        # land exactly on a half cent; defer those to Python's round()
+        scaled = amounts * 100.0
+        rounded = np.rint(scaled) / 100.0
+        ties = np.flatnonzero(scaled - np.floor(scaled) == 0.5)
+        if ties.size:
+            rounded[ties] = [round(float(amount), 2) for amount in amounts[ties]]
+
+        return np.maximum(0.01, rounded)
 
     @staticmethod
     def _get_quality_tier(score: int) -> str:
         """Determine quality tier from score"""
-        if score >= 95:
-            return "excellent"
-        elif score >= 85:
-            return "good"
-        elif score >= 70:
-            return "acceptable"
-        else:
-            return "needs_work"
+        return _QUALITY_TIERS[bisect_right(_QUALITY_THRESHOLDS, score)]
 
     @staticmethod
     def _get_time_tier(execution_time_sec: float) -> str:
         """Determine time tier from execution time"""
-        if execution_time_sec < 30:
-            return "very_fast"
-        elif execution_time_sec < 60:
-            return "fast"
-        elif execution_time_sec <= 120:
-            return "normal"
-        else:
-            return "slow"
+        return _TIME_TIERS[bisect_right(_TIME_THRESHOLDS, execution_time_sec)]
 
     @classmethod
-    def format_payment_summary(cls, payment_info: Dict[str, Any]) -> str:
+    def format_payment_summary(cls, payment_info: Union[PaymentResult, Dict[str, Any]]) -> str:
         """
         Format payment information for display
 
         Args:
-            payment_info: Payment info dict from calculate_payment()
+            payment_info: PaymentResult from calculate_payment() (or its to_dict())
 
         Returns:
             Formatted payment summary string
@@ -150,30 +251,78 @@ class PaymentCalculator:
         amount = payment_info["amount"]
         breakdown = payment_info["breakdown"]
 
-        summary = f"Payment: ${amount:.2f}\n"
-        summary += f"  Base ({breakdown['complexity']}): ${breakdown['base_price']:.2f}\n"
-        summary += f"  Quality bonus ({breakdown['quality_tier']}): ×{breakdown['quality_multiplier']}\n"
-        summary += f"  Speed bonus ({breakdown['time_tier']}): ×{breakdown['time_multiplier']}\n"
+        parts = [
+            f"Payment: ${amount:.2f}\n",
+            f"  Base ({breakdown['complexity']}): ${breakdown['base_price']:.2f}\n",
+            f"  Quality bonus ({breakdown['quality_tier']}): ×{breakdown['quality_multiplier']}\n",
+            f"  Speed bonus ({breakdown['time_tier']}): ×{breakdown['time_multiplier']}\n"
+        ]
 
         if breakdown['token_cost'] > 0:
-            summary += f"  Token cost ({breakdown['tokens_used']:,} tokens): +${breakdown['token_cost']:.4f}\n"
-
-        return summary
-
-
-# Convenience function for quick calculations
-def calculate_task_payment(
-    complexity: str = "unknown",
-    quality_score: int = 85,
-    execution_time_ms: int = 0,
-    tokens_used: int = 0,
-    code_lines: int = 0
-) -> Dict[str, Any]:
-    """Convenience wrapper for PaymentCalculator.calculate_payment()"""
-    return PaymentCalculator.calculate_payment(
-        complexity=complexity,
-        quality_score=quality_score,
-        execution_time_ms=execution_time_ms,
-        tokens_used=tokens_used,
-        code_lines=code_lines
-    )
+            parts.append(f"  Token cost ({breakdown['tokens_used']:,} tokens): +${breakdown['token_cost']:.4f}\n")
+
+        return "".join(parts)
+
+
+# Precomputed base × quality × time price for every tier combination
+_PRICE_TABLE = {
+    (complexity, quality_tier, time_tier): base_price * quality_multiplier * time_multiplier
+    for complexity, base_price in PaymentCalculator.BASE_PRICING.items()
+    for quality_tier, quality_multiplier in PaymentCalculator.QUALITY_MULTIPLIERS.items()
+    for time_tier, time_multiplier in PaymentCalculator.TIME_BONUS.items()
+}
+# Read once rather than through the class on every call. Applied as
+# (tokens / 1000) * rate, not tokens * (rate / 1000): the two differ in the
+# last bit, which flips half-cent ties in the rounded amount
+_TOKEN_COST_PER_1K = PaymentCalculator.TOKEN_COST_PER_1K
+
+
+@lru_cache(maxsize=4096)
+def _compute_amount(
+    price_key: str,
+    quality_score: int,
+    execution_time_sec: float,
+    tokens_used: int
+) -> Tuple[float, str, str, float]:
+    """
+    Numeric core of PaymentCalculator.calculate_payment, kept free of dict building
+
+    Memoized: re-scoring a ledger repeats the same inputs often, and
+    quality scores cluster on a handful of values. Module-level rather
+    than a cached classmethod so the module also compiles under mypyc.
+
+    Returns:
+        (final_payment, quality_tier, time_tier, token_cost)
+    """
+    # Tier lookups inlined from _get_quality_tier/_get_time_tier
+    quality_tier = _QUALITY_TIERS[bisect_right(_QUALITY_THRESHOLDS, quality_score)]
+    time_tier = _TIME_TIERS[bisect_right(_TIME_THRESHOLDS, execution_time_sec)]
+
+    # Calculate token cost (actual API usage cost)
+    token_cost = (max(tokens_used, 0) / 1000.0) * _TOKEN_COST_PER_1K
+
+    # Formula: (base_price × quality × time) + token_cost
+    final_payment = _PRICE_TABLE[(price_key, quality_tier, time_tier)] + token_cost
+
+    # Round to nearest cent, with a minimum payment of $0.01
+    final_payment = max(0.01, round(final_payment, 2))
+
+    return final_payment, quality_tier, time_tier, token_cost
+
+
+# Convenience alias for quick calculations (same signature and defaults)
+calculate_task_payment = PaymentCalculator.calculate_payment
+
+
+def serialize_payment(payment_info: Union[PaymentResult, Dict[str, Any]]) -> bytes:
+    """
+    Encode payment information as UTF-8 JSON bytes for the API/ledger boundary
+
+    Uses orjson when installed (faster, and emits bytes directly),
+    otherwise the standard library json module.
+    """
+    if isinstance(payment_info, PaymentResult):
+        payment_info = payment_info.to_dict()
+    if orjson is not None:
+        return orjson.dumps(payment_info, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payment_info).encode("utf-8")
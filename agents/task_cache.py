@@ -0,0 +1,116 @@
+"""
+Result cache for swarm tasks
+Skips the LLM round trip when the exact same task is submitted again
+"""
+
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Any, Dict, Optional, Tuple
+import threading
+import time
+
+# Number of task results kept before the least recently used is evicted
+DEFAULT_MAX_ENTRIES = 128
+
+# Seconds a result stays valid; after that the task goes back to the swarm
+DEFAULT_TTL_SECONDS = 3600
+
+
+def mark_cache_hit(result: Dict[str, Any], elapsed_ms: float) -> Dict[str, Any]:
+    """
+    Adapt a cached result for re-serving: the work was already paid for, so
+    the payment is zeroed and marked non-billable, and execution_time_ms is
+    the lookup time rather than the original swarm run
+
+    Args:
+        result: Copy of the cached result, as returned by TaskCache.get
+        elapsed_ms: Time actually spent serving this request
+
+    Returns:
+        The same dict, updated in place
+    """
+    payment = result.get("payment")
+    if isinstance(payment, dict):
+        result["payment"] = {
+            **payment,
+            "amount": 0.0,
+            "billable": False,
+            "original_amount": payment.get("amount")
+        }
+    result["execution_time_ms"] = elapsed_ms
+    result["cached"] = True
+    return result
+
+
+class TaskCache:
+    """
+    Thread-safe LRU cache of swarm results keyed by task text
+
+    Keys are blake2b digests of the task, so long task descriptions are not
+    held in memory twice. Only exact matches hit: a paraphrased task may
+    need different code, so it always goes to the swarm. Entries expire
+    after ttl_seconds.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum number of results to keep
+            ttl_seconds: Seconds before a cached result expires
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Values are (expiry time on the monotonic clock, result)
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(task: str) -> bytes:
+        return blake2b(task.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, task: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the result of an earlier identical task
+
+        Returns:
+            A copy of the cached result dict, or None on a miss or if expired
+        """
+        key = self._key(task)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return dict(result)
+
+    def put(self, task: str, result: Dict[str, Any]) -> None:
+        """
+        Store a task result; failed results are not cached so they are retried
+
+        Args:
+            task: Task text exactly as passed to the swarm
+            result: Result dict returned by process_task
+        """
+        if not result.get("success"):
+            return
+        key = self._key(task)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(result))
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
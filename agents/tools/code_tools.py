@@ -2,9 +2,84 @@
 Code analysis tools for agents
 """
 
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, NamedTuple, Tuple
 import re
 
+# Compiled once at import rather than looked up in re's cache per call
+_DEF_RE = re.compile(r'def\s+\w+')
+_CLASS_RE = re.compile(r'class\s+\w+')
+
+# Security checks in report order: (keyword, case_insensitive, also_requires_any,
+# severity, message). A check fires when the keyword occurs in the code and,
+# if also_requires_any is non-empty, at least one of those substrings does too.
+_SECURITY_CHECKS = (
+    ('eval(', False, (), "high", "Use of eval() - potential code injection risk"),
+    ('exec(', False, (), "high", "Use of exec() - potential code injection risk"),
+    ('pickle.loads', False, (), "medium", "Pickle deserialization - validate input source"),
+    ('password', True, ('=', 'input('), "medium", "Hardcoded credentials or password in plain text"),
+    ('sql', True, ('+',), "medium", "Potential SQL injection via string concatenation"),
+    ('os.system', False, (), "medium", "Use of os.system() - validate all inputs"),
+)
+
+
+class _CodeScan(NamedTuple):
+    """Line and keyword statistics shared by the code analysis tools"""
+    loc: int
+    imports: Tuple[str, ...]
+    functions: int
+    classes: int
+    has_try: bool
+    has_except: bool
+    print_count: int  # capped at _PRINT_COUNT_LIMIT + 1
+
+
+# find_code_patterns only asks whether there are more prints than this
+_PRINT_COUNT_LIMIT = 5
+
+
+def _count_capped(text: str, needle: str, cap: int) -> int:
+    """Count occurrences of needle like str.count, but stop once past cap"""
+    count = 0
+    index = text.find(needle)
+    while index != -1:
+        count += 1
+        if count > cap:
+            break
+        index = text.find(needle, index + len(needle))
+    return count
+
+
+@lru_cache(maxsize=32)
+def _scan_code(code: str) -> _CodeScan:
+    """
+    Scan code once for the statistics used by analyze_code_complexity and
+    find_code_patterns.
+
+    Each line is stripped once for both the LOC count and import detection.
+    Cached, since agents typically run several tools over the same snippet.
+    """
+    loc = 0
+    imports = []
+    for line in code.split('\n'):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if not stripped.startswith('#'):
+            loc += 1
+            if stripped.startswith(('import ', 'from ')):
+                imports.append(stripped)
+
+    return _CodeScan(
+        loc=loc,
+        imports=tuple(imports),
+        functions=len(_DEF_RE.findall(code)),
+        classes=len(_CLASS_RE.findall(code)),
+        has_try='try:' in code,
+        has_except='except' in code,
+        print_count=_count_capped(code, 'print(', _PRINT_COUNT_LIMIT)
+    )
+
 
 def analyze_code_complexity(code: str, language: str = "python") -> Dict[str, Any]:
     """
@@ -17,14 +92,15 @@ def analyze_code_complexity(code: str, language: str = "python") -> Dict[str, An
     Returns:
         Dict containing complexity metrics and recommendations
     """
+    scan = _scan_code(code)
+
     # Count lines of code
-    lines = code.split('\n')
-    loc = len([l for l in lines if l.strip() and not l.strip().startswith('#')])
+    loc = scan.loc
     
     # Count functions/methods
     if language == "python":
-        functions = len(re.findall(r'def\s+\w+', code))
-        classes = len(re.findall(r'class\s+\w+', code))
+        functions = scan.functions
+        classes = scan.classes
     else:
         functions = 0
         classes = 0
@@ -73,15 +149,13 @@ def find_code_patterns(code: str, language: str = "python") -> Dict[str, List[st
         "anti_patterns": []
     }
     
-    lines = code.split('\n')
+    scan = _scan_code(code)
     
     # Find imports
-    for line in lines:
-        if line.strip().startswith('import ') or line.strip().startswith('from '):
-            patterns["imports"].append(line.strip())
+    patterns["imports"].extend(scan.imports)
     
     # Find error handling
-    if 'try:' in code and 'except' in code:
+    if scan.has_try and scan.has_except:
         patterns["error_handling"].append("try-except blocks found")
     
     # Find testing patterns
@@ -92,7 +166,7 @@ def find_code_patterns(code: str, language: str = "python") -> Dict[str, List[st
     if 'except:' in code and 'except Exception:' not in code:
         patterns["anti_patterns"].append("Bare except clause (catch-all exception)")
     
-    if code.count('print(') > 5:
+    if scan.print_count > _PRINT_COUNT_LIMIT:
         patterns["anti_patterns"].append("Excessive print statements (use logging)")
     
     return patterns
@@ -115,24 +189,21 @@ def detect_security_issues(code: str) -> Dict[str, List[str]]:
         "info": []
     }
     
-    # Check for common security issues
-    if 'eval(' in code:
-        issues["high"].append("Use of eval() - potential code injection risk")
-    
-    if 'exec(' in code:
-        issues["high"].append("Use of exec() - potential code injection risk")
-    
-    if 'pickle.loads' in code:
-        issues["medium"].append("Pickle deserialization - validate input source")
-    
-    if 'password' in code.lower() and ('=' in code or 'input(' in code):
-        issues["medium"].append("Hardcoded credentials or password in plain text")
-    
-    if 'sql' in code.lower() and '+' in code:
-        issues["medium"].append("Potential SQL injection via string concatenation")
-    
-    if 'os.system' in code:
-        issues["medium"].append("Use of os.system() - validate all inputs")
+    # Check for common security issues. The cheap case-sensitive co-conditions
+    # are tested first, so the lower-cased copy is made at most once and only
+    # when a case-insensitive keyword could still produce a finding.
+    code_lower = None
+    for keyword, case_insensitive, also_requires_any, severity, message in _SECURITY_CHECKS:
+        if also_requires_any and not any(s in code for s in also_requires_any):
+            continue
+        if case_insensitive:
+            if code_lower is None:
+                code_lower = code.lower()
+            found = keyword in code_lower
+        else:
+            found = keyword in code
+        if found:
+            issues[severity].append(message)
     
     # Info level
     if not any([issues["high"], issues["medium"], issues["low"]]):
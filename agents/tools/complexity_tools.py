@@ -2,7 +2,63 @@
 Task complexity analysis tools
 """
 
-from typing import Dict, Any, List
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # optional: fall back to per-keyword substring scans
+    ahocorasick = None
+
+# Keyword analysis for complexity indicators (matched as lower-case substrings)
+COMPLEX_KEYWORDS = (
+    'architecture', 'refactor', 'migration', 'scalability',
+    'distributed', 'microservices', 'security', 'authentication',
+    'authorization', 'performance', 'optimization', 'integration'
+)
+
+SIMPLE_KEYWORDS = (
+    'fix', 'bug', 'typo', 'update', 'change', 'add', 'remove',
+    'button', 'text', 'color', 'style'
+)
+
+
+# bisect_right(_EFFORT_THRESHOLDS, points) indexes the tier; each threshold is
+# the lowest effort-point total of the next tier
+_EFFORT_THRESHOLDS = (5, 15)
+_EFFORT_TIERS = (
+    ("15-30 minutes", "simple"),
+    ("30-60 minutes", "medium"),
+    ("1-3 hours", "complex")
+)
+
+
+def _build_keyword_automaton():
+    """Aho-Corasick automaton over all keywords, valued (keyword, is_complex)"""
+    automaton = ahocorasick.Automaton()
+    for keyword in COMPLEX_KEYWORDS:
+        automaton.add_word(keyword, (keyword, True))
+    for keyword in SIMPLE_KEYWORDS:
+        automaton.add_word(keyword, (keyword, False))
+    automaton.make_automaton()
+    return automaton
+
+
+# One pass over the description finds every keyword (pyahocorasick, if installed)
+_KEYWORD_AUTOMATON = _build_keyword_automaton() if ahocorasick is not None else None
+
+
+def _count_keywords(description_lower: str) -> Tuple[int, int]:
+    """Count distinct complex and simple keywords present in the description"""
+    if _KEYWORD_AUTOMATON is None:
+        complex_count = sum(1 for kw in COMPLEX_KEYWORDS if kw in description_lower)
+        simple_count = sum(1 for kw in SIMPLE_KEYWORDS if kw in description_lower)
+        return complex_count, simple_count
+
+    found = {value for _, value in _KEYWORD_AUTOMATON.iter(description_lower)}
+    complex_count = sum(1 for _, is_complex in found if is_complex)
+    return complex_count, len(found) - complex_count
 
 
 def analyze_task_complexity(description: str, requirements: Dict = None) -> Dict[str, Any]:
@@ -16,25 +72,20 @@ def analyze_task_complexity(description: str, requirements: Dict = None) -> Dict
     Returns:
         Complexity analysis with recommendations
     """
+    # The analysis only depends on the stripped, lower-cased description, and
+    # the pipeline re-analyzes the same task text; copy so the cached dict is
+    # never handed out for mutation
+    return dict(_analyze_description(description.strip().lower()))
+
+
+@lru_cache(maxsize=1024)
+def _analyze_description(description_lower: str) -> Dict[str, Any]:
+    """Body of analyze_task_complexity, keyed on the normalized description"""
     # Word count analysis
-    word_count = len(description.split())
+    word_count = len(description_lower.split())
     
     # Keyword analysis for complexity indicators
-    complex_keywords = [
-        'architecture', 'refactor', 'migration', 'scalability',
-        'distributed', 'microservices', 'security', 'authentication',
-        'authorization', 'performance', 'optimization', 'integration'
-    ]
-    
-    simple_keywords = [
-        'fix', 'bug', 'typo', 'update', 'change', 'add', 'remove',
-        'button', 'text', 'color', 'style'
-    ]
-    
-    description_lower = description.lower()
-    
-    complex_count = sum(1 for kw in complex_keywords if kw in description_lower)
-    simple_count = sum(1 for kw in simple_keywords if kw in description_lower)
+    complex_count, simple_count = _count_keywords(description_lower)
     
     # Determine complexity
     if word_count < 30 and simple_count > complex_count:
@@ -91,15 +142,7 @@ def estimate_effort(requirements: Dict, context: Dict = None) -> Dict[str, Any]:
         effort_points += 5
     
     # Map to time estimate
-    if effort_points < 5:
-        time_estimate = "15-30 minutes"
-        complexity = "simple"
-    elif effort_points < 15:
-        time_estimate = "30-60 minutes"
-        complexity = "medium"
-    else:
-        time_estimate = "1-3 hours"
-        complexity = "complex"
+    time_estimate, complexity = _EFFORT_TIERS[bisect_right(_EFFORT_THRESHOLDS, effort_points)]
     
     return {
         "effort_points": effort_points,
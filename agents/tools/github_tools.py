@@ -4,12 +4,172 @@ Fetches and analyzes GitHub repositories for codebase context
 """
 
 from strands import tool
-from typing import Dict, Any, List, Optional
+from collections import Counter
+from functools import lru_cache
+from itertools import compress
+from operator import itemgetter
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import subprocess
 import tempfile
 import os
+import re
 import shutil
-from pathlib import Path
+
+# Files analyze_repository_structure reports as key files
+_KEY_FILENAMES = frozenset({
+    'README.md', 'README.rst', 'README.txt',
+    'requirements.txt', 'package.json', 'setup.py',
+    'Dockerfile', 'docker-compose.yml', '.env.example',
+    'Makefile', 'pyproject.toml', 'Cargo.toml'
+})
+
+# Number of entries analyze_repository_structure lists in its file_tree
+_FILE_TREE_LIMIT = 50
+
+# Files extract_key_file_contents reads when no patterns are given
+_DEFAULT_EXTRACT_FILENAMES = frozenset({
+    'README.md', 'README.rst', 'README.txt',
+    'requirements.txt', 'package.json', 'setup.py',
+    '.env.example', 'pyproject.toml'
+})
+
+# Dependency and build directories whose manifests and READMEs describe
+# third-party code, not the repository; extract_key_file_contents skips them
+_VENDORED_DIRS = frozenset({'node_modules', 'venv', '.venv', '__pycache__', 'site-packages'})
+
+
+def _iter_files(repo_path: str) -> Iterator[Tuple[os.DirEntry, str, int]]:
+    """
+    Yield (entry, rel_path, depth) for every file under repo_path
+
+    Visits files in the same order as a top-down os.walk, but reuses each
+    DirEntry's cached type and builds relative paths by concatenation.
+    Directories with '.git' in their name are pruned instead of walked and
+    discarded; symlinked directories are not followed.
+    """
+    stack = [(repo_path, '', 0)]
+    while stack:
+        dir_path, rel_dir, depth = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if not is_dir:
+                yield entry, rel_dir + entry.name, depth
+            elif '.git' not in entry.name and not entry.is_symlink():
+                subdirs.append(entry)
+
+        # Reversed so the first subdirectory is popped (and walked) first
+        stack.extend((entry.path, rel_dir + entry.name + os.sep, depth + 1) for entry in reversed(subdirs))
+
+
+@lru_cache(maxsize=8)
+def _list_files(repo_path: str, root_mtime_ns: int) -> Tuple[Tuple[str, str, str, int], ...]:
+    """Walk repo_path once; cached per root mtime (see _repository_files)"""
+    return tuple((entry.name, entry.path, rel_path, depth) for entry, rel_path, depth in _iter_files(repo_path))
+
+
+def _repository_files(repo_path: str) -> Tuple[Tuple[str, str, str, int], ...]:
+    """
+    (name, path, rel_path, depth) for every file under repo_path, in walk order
+
+    The repository tools are usually called one after another on the same
+    freshly cloned checkout, so the walk is shared between them. Keying on
+    the root directory's mtime means a path that is reused for a different
+    checkout is walked again; changes deeper in an already-walked tree are
+    not picked up.
+    """
+    try:
+        root_mtime_ns = os.stat(repo_path).st_mtime_ns
+    except OSError:
+        return ()
+    return _list_files(repo_path, root_mtime_ns)
+
+
+def _read_text_head(path: str, max_chars: int) -> str:
+    """
+    Same as open(path, encoding='utf-8', errors='ignore').read(max_chars)
+
+    Reads the raw bytes with a single os.read and decodes them directly,
+    skipping the BufferedReader/TextIOWrapper stack for these small reads.
+    """
+    max_bytes = max_chars * 4  # UTF-8 uses at most 4 bytes per character
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        data = os.read(fd, max_bytes)
+    finally:
+        os.close(fd)
+
+    text = data.decode('utf-8', errors='ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    if len(text) < max_chars and len(data) == max_bytes:
+        # Dropped bytes or CRLFs left us short of a full read; let the
+        # text layer read on
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read(max_chars)
+    return text[:max_chars]
+
+
+def _suffix(name: str) -> str:
+    """Same as Path(name).suffix, without constructing a Path"""
+    index = name.rfind('.')
+    if 0 < index < len(name) - 1:
+        return name[index:]
+    return ''
+
+
+# A per-line search only ever sees one line, so these constructs can match
+# differently once the rest of the file follows; queries using them are
+# searched line by line rather than over the whole file.
+_LINE_SENSITIVE_TOKENS = ('$', '\\A', '\\Z', '\\B', '(?!', '(?<!')
+
+# How much of a file's head is checked for NUL bytes before searching it
+_BINARY_PROBE_SIZE = 8192
+
+
+def _matching_lines(f, pattern: re.Pattern, buffer_pattern: Optional[re.Pattern]) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (line_num, line) for each line of f that pattern.search() matches
+
+    With a buffer_pattern (the same query compiled with re.MULTILINE), the
+    whole file is scanned in one pass and only lines containing a candidate
+    match are re-checked with pattern, instead of entering the regex engine
+    once per line. Without one, falls back to the per-line search.
+    """
+    if buffer_pattern is None:
+        for line_num, line in enumerate(f, 1):
+            if pattern.search(line):
+                yield line_num, line
+        return
+
+    text = f.read()
+    line_num = 1
+    line_start = 0
+    pos = 0
+    while pos < len(text) and (match := buffer_pattern.search(text, pos)):
+        begin = text.rfind('\n', 0, match.start()) + 1
+        if begin == len(text):
+            break  # empty match after the final newline, not a line
+
+        line_num += text.count('\n', line_start, begin)
+        line_start = begin
+        end = text.find('\n', begin)
+        end = len(text) if end == -1 else end + 1
+
+        line = text[begin:end]
+        if pattern.search(line):
+            yield line_num, line
+        pos = end
 
 
 @tool
@@ -33,7 +193,7 @@ def clone_github_repository(repo_url: str, branch: str = "main") -> Dict[str, An
         temp_dir = tempfile.mkdtemp(prefix="codecollab_repo_")
 
         # Extract repo name from URL
-        repo_name = repo_url.rstrip('/').split('/')[-1].replace('.git', '')
+        repo_name = repo_url.rstrip('/').rsplit('/', 1)[-1].replace('.git', '')
 
         # Clone repository
         result = subprocess.run(
@@ -100,45 +260,23 @@ def analyze_repository_structure(repo_path: str) -> Dict[str, Any]:
                 "error": f"Repository path does not exist: {repo_path}"
             }
 
-        # Count files and detect languages
-        file_extensions = {}
-        key_files = []
-        total_files = 0
-        file_tree = []
-
-        key_filenames = [
-            'README.md', 'README.rst', 'README.txt',
-            'requirements.txt', 'package.json', 'setup.py',
-            'Dockerfile', 'docker-compose.yml', '.env.example',
-            'Makefile', 'pyproject.toml', 'Cargo.toml'
-        ]
-
-        for root, dirs, files in os.walk(repo_path):
-            # Skip .git directory
-            if '.git' in root:
-                continue
-
-            rel_root = os.path.relpath(root, repo_path)
-            level = rel_root.count(os.sep)
-
-            for file in files:
-                total_files += 1
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, repo_path)
+        # Count files and detect languages. Each statistic is one C-level
+        # pass (map/Counter/compress) over the walk, not a Python loop body
+        # run per file
+        files = _repository_files(repo_path)
+        names = list(map(itemgetter(0), files))
+        total_files = len(files)
 
-                # Track file extensions
-                ext = Path(file).suffix
-                if ext:
-                    file_extensions[ext] = file_extensions.get(ext, 0) + 1
+        # Track file extensions
+        file_extensions = Counter(map(_suffix, names))
+        file_extensions.pop('', None)
 
-                # Identify key files
-                if file in key_filenames:
-                    key_files.append(rel_path)
+        # Identify key files
+        key_files = list(compress(map(itemgetter(2), files), map(_KEY_FILENAMES.__contains__, names)))
 
-                # Build file tree (limit to first 100 files)
-                if len(file_tree) < 100:
-                    indent = "  " * level
-                    file_tree.append(f"{indent}{file}")
+        # Build file tree (limit to the 50 files returned); top-level files
+        # and those one directory down share the first indent level
+        file_tree = ["  " * max(depth - 1, 0) + file for file, _, _, depth in files[:_FILE_TREE_LIMIT]]
 
         # Map extensions to languages
         language_map = {
@@ -164,21 +302,20 @@ def analyze_repository_structure(repo_path: str) -> Dict[str, Any]:
             '.md': 'Markdown'
         }
 
-        languages = {}
+        languages = Counter()
         for ext, count in file_extensions.items():
-            lang = language_map.get(ext, ext)
-            languages[lang] = languages.get(lang, 0) + count
+            languages[language_map.get(ext, ext)] += count
 
-        # Sort languages by file count
-        languages = dict(sorted(languages.items(), key=lambda x: x[1], reverse=True))
+        # Sort languages by file count (ties keep first-seen order)
+        languages = dict(languages.most_common())
 
         return {
             "success": True,
-            "file_tree": file_tree[:50],  # First 50 files
+            "file_tree": file_tree,  # First 50 files
             "file_count": total_files,
             "languages": languages,
             "key_files": key_files,
-            "primary_language": list(languages.keys())[0] if languages else "Unknown"
+            "primary_language": next(iter(languages), "Unknown")
         }
 
     except Exception as e:
@@ -202,30 +339,22 @@ def extract_key_file_contents(repo_path: str, file_patterns: List[str] = None) -
     """
     try:
         if file_patterns is None:
-            file_patterns = [
-                'README.md', 'README.rst', 'README.txt',
-                'requirements.txt', 'package.json', 'setup.py',
-                '.env.example', 'pyproject.toml'
-            ]
+            file_patterns = _DEFAULT_EXTRACT_FILENAMES
+        else:
+            file_patterns = frozenset(file_patterns)
 
         file_contents = {}
 
-        for root, dirs, files in os.walk(repo_path):
-            # Skip .git directory
-            if '.git' in root:
+        for name, path, rel_path, depth in _repository_files(repo_path):
+            if name not in file_patterns:
+                continue
+            if depth and not _VENDORED_DIRS.isdisjoint(rel_path.split(os.sep)[:-1]):
                 continue
 
-            for file in files:
-                if file in file_patterns:
-                    file_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(file_path, repo_path)
-
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read(5000)  # First 5000 characters
-                            file_contents[rel_path] = content
-                    except Exception as e:
-                        file_contents[rel_path] = f"Error reading file: {str(e)}"
+            try:
+                file_contents[rel_path] = _read_text_head(path, 5000)  # First 5000 characters
+            except Exception as e:
+                file_contents[rel_path] = f"Error reading file: {str(e)}"
 
         return file_contents
 
@@ -247,39 +376,38 @@ def search_codebase(repo_path: str, query: str, file_extension: str = None) -> L
         List of matches with file path, line number, and content
     """
     try:
-        import re
-
         matches = []
         pattern = re.compile(query, re.IGNORECASE)
+        if any(token in query for token in _LINE_SENSITIVE_TOKENS):
+            buffer_pattern = None
+        else:
+            buffer_pattern = re.compile(query, re.IGNORECASE | re.MULTILINE)
 
-        for root, dirs, files in os.walk(repo_path):
-            # Skip .git directory
-            if '.git' in root:
+        for name, path, rel_path, _ in _repository_files(repo_path):
+            # Filter by extension if specified
+            if file_extension and not name.endswith(file_extension):
                 continue
 
-            for file in files:
-                # Filter by extension if specified
-                if file_extension and not file.endswith(file_extension):
-                    continue
-
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, repo_path)
-
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        for line_num, line in enumerate(f, 1):
-                            if pattern.search(line):
-                                matches.append({
-                                    "file": rel_path,
-                                    "line": line_num,
-                                    "content": line.strip()[:200]  # First 200 chars
-                                })
-
-                                # Limit to 50 matches
-                                if len(matches) >= 50:
-                                    return matches
-                except:
-                    continue
+            try:
+                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                    # Skip binary files (images, archives, ...) before paying
+                    # to decode them; peek() fills the read buffer without
+                    # consuming it, so the text read below starts at byte 0
+                    if b'\x00' in f.buffer.peek(_BINARY_PROBE_SIZE)[:_BINARY_PROBE_SIZE]:
+                        continue
+
+                    for line_num, line in _matching_lines(f, pattern, buffer_pattern):
+                        matches.append({
+                            "file": rel_path,
+                            "line": line_num,
+                            "content": line.strip()[:200]  # First 200 chars
+                        })
+
+                        # Limit to 50 matches
+                        if len(matches) >= 50:
+                            return matches
+            except:
+                continue
 
         return matches
 
@@ -287,6 +415,13 @@ def search_codebase(repo_path: str, query: str, file_extension: str = None) -> L
         return [{"error": f"Search failed: {str(e)}"}]
 
 
+def _is_temp_checkout(repo_path: str) -> bool:
+    """True if repo_path resolves to a directory strictly inside the system temp dir"""
+    temp_root = os.path.realpath(tempfile.gettempdir())
+    real_path = os.path.realpath(repo_path)
+    return real_path != temp_root and os.path.commonpath([real_path, temp_root]) == temp_root
+
+
 @tool
 def cleanup_repository(repo_path: str) -> Dict[str, bool]:
     """
@@ -299,8 +434,19 @@ def cleanup_repository(repo_path: str) -> Dict[str, bool]:
         Dict with success status
     """
     try:
-        if os.path.exists(repo_path) and repo_path.startswith('/tmp'):
-            shutil.rmtree(repo_path)
+        if os.path.exists(repo_path) and _is_temp_checkout(repo_path):
+            real_path = os.path.realpath(repo_path)
+            if os.name == 'posix':
+                # Delete in a detached rm so the agent does not wait while a
+                # large checkout is unlinked file by file
+                subprocess.Popen(
+                    ['rm', '-rf', '--', real_path],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True
+                )
+            else:
+                shutil.rmtree(real_path)
             return {"success": True, "message": f"Cleaned up {repo_path}"}
         else:
             return {"success": False, "error": "Invalid repository path"}
@@ -321,7 +467,7 @@ def get_repository_metadata(repo_url: str) -> Dict[str, Any]:
     """
     try:
         # Extract owner and repo name
-        parts = repo_url.rstrip('/').split('/')
+        parts = repo_url.rstrip('/').rsplit('/', 2)
         if len(parts) >= 2:
             owner = parts[-2]
             repo = parts[-1].replace('.git', '')
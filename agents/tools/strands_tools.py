@@ -6,9 +6,24 @@ from strands import tool
 import re
 import ast
 import subprocess
+import sys
 import tempfile
 import os
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+from .test_tools import SCRATCH_DIR
+
+# ```python fenced blocks in agent output
+_PYTHON_FENCE_RE = re.compile(r'```python\n(.*?)\n```', re.DOTALL)
+
+# Bare function definitions outside fences: the def line plus following lines,
+# up to a blank line, a comment line, a class line or the end of the text.
+# Matches line by line instead of with a lazy DOTALL scan.
+_BARE_DEF_RE = re.compile(r'def \w+[^\n]*(?:\n(?![\n#]|class)[^\n]*)*')
+
+# Branching keywords counted (as substrings) by analyze_code_complexity
+_COMPLEXITY_INDICATORS = ('if ', 'elif ', 'else:', 'for ', 'while ', 'try:', 'except:', 'with ')
 
 
 @tool
@@ -27,36 +42,41 @@ def analyze_code_complexity(code: str) -> Dict[str, Any]:
         # Parse the AST
         tree = ast.parse(code)
         
-        # Count functions and classes
-        functions = [node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
-        classes = [node for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
+        # Collect function and class names in a single walk of the tree;
+        # only the names are kept, so the tree can be freed on return
+        functions = []
+        classes = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.FunctionDef):
+                functions.append(node.name)
+            elif isinstance(node, ast.ClassDef):
+                classes.append(node.name)
         
         # Count lines (excluding empty lines and comments)
-        lines = [line.strip() for line in code.split('\n') if line.strip() and not line.strip().startswith('#')]
+        line_count = sum(
+            1 for line in code.split('\n')
+            if (stripped := line.strip()) and not stripped.startswith('#')
+        )
         
         # Simple complexity heuristics
-        complexity_indicators = [
-            'if ', 'elif ', 'else:', 'for ', 'while ', 'try:', 'except:', 'with '
-        ]
-        
-        complexity_score = sum(code.count(indicator) for indicator in complexity_indicators)
+        complexity_score = sum(code.count(indicator) for indicator in _COMPLEXITY_INDICATORS)
         
         # Assess complexity level
-        if len(lines) < 20 and complexity_score < 5:
+        if line_count < 20 and complexity_score < 5:
             complexity_level = "Simple"
-        elif len(lines) < 100 and complexity_score < 15:
+        elif line_count < 100 and complexity_score < 15:
             complexity_level = "Medium" 
         else:
             complexity_level = "Complex"
             
         return {
-            "line_count": len(lines),
+            "line_count": line_count,
             "function_count": len(functions),
             "class_count": len(classes),
             "complexity_score": complexity_score,
             "complexity_level": complexity_level,
-            "functions": [f.name for f in functions],
-            "classes": [c.name for c in classes]
+            "functions": functions,
+            "classes": classes
         }
         
     except SyntaxError as e:
@@ -83,8 +103,7 @@ def extract_code_blocks(text: str) -> List[Dict[str, str]]:
         List of dictionaries with extracted code blocks
     """
     # Pattern to match ```python code blocks
-    pattern = r'```python\n(.*?)\n```'
-    matches = re.findall(pattern, text, re.DOTALL)
+    matches = _PYTHON_FENCE_RE.findall(text)
     
     code_blocks = []
     for i, code in enumerate(matches):
@@ -97,8 +116,7 @@ def extract_code_blocks(text: str) -> List[Dict[str, str]]:
     
     # Also look for simple function definitions not in code blocks
     if not code_blocks:
-        func_pattern = r'(def \w+.*?)(?=\n\n|\nclass|\n#|\Z)'
-        func_matches = re.findall(func_pattern, text, re.DOTALL)
+        func_matches = _BARE_DEF_RE.findall(text)
         
         for i, code in enumerate(func_matches):
             code_blocks.append({
@@ -111,6 +129,22 @@ def extract_code_blocks(text: str) -> List[Dict[str, str]]:
     return code_blocks
 
 
+@lru_cache(maxsize=32)
+def _find_syntax_error(code: str) -> Optional[Tuple[Optional[int], Optional[int], str]]:
+    """
+    (lineno, offset, msg) of the first syntax error in code, or None
+
+    Parses exactly like ast.parse, but calls compile() directly with
+    dont_inherit=True so this module's future flags never apply. Cached,
+    since builder, tester and reviewer tend to validate the same snippet.
+    """
+    try:
+        compile(code, '<unknown>', 'exec', ast.PyCF_ONLY_AST, dont_inherit=True)
+    except SyntaxError as e:
+        return (e.lineno, e.offset, e.msg)
+    return None
+
+
 @tool
 def validate_python_syntax(code: str) -> Dict[str, Any]:
     """
@@ -124,22 +158,23 @@ def validate_python_syntax(code: str) -> Dict[str, Any]:
     """
     try:
         # Try to parse the code
-        ast.parse(code)
+        syntax_error = _find_syntax_error(code)
         
-        return {
-            "is_valid": True,
-            "message": "Code syntax is valid",
-            "errors": []
-        }
+        if syntax_error is None:
+            return {
+                "is_valid": True,
+                "message": "Code syntax is valid",
+                "errors": []
+            }
         
-    except SyntaxError as e:
+        lineno, offset, msg = syntax_error
         return {
             "is_valid": False,
-            "message": f"Syntax error: {e.msg}",
+            "message": f"Syntax error: {msg}",
             "errors": [{
-                "line": e.lineno,
-                "column": e.offset,
-                "message": e.msg,
+                "line": lineno,
+                "column": offset,
+                "message": msg,
                 "type": "SyntaxError"
             }]
         }
@@ -167,14 +202,15 @@ def run_python_tests(code: str) -> Dict[str, Any]:
     """
     try:
         # Create a temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', dir=SCRATCH_DIR, delete=False) as f:
             f.write(code)
             temp_file = f.name
         
         try:
-            # Execute the code
+            # Execute the code with this interpreter rather than whichever
+            # 'python' is first on PATH
             result = subprocess.run(
-                ['python', temp_file],
+                [sys.executable, temp_file],
                 capture_output=True,
                 text=True,
                 timeout=30
@@ -250,52 +286,42 @@ def generate_test_cases(function_signature: str, description: str) -> List[str]:
     return test_cases
 
 
-@tool 
-def assess_task_difficulty(requirements: str) -> Dict[str, Any]:
-    """
-    Assess the difficulty level of a development task.
-    
-    Args:
-        requirements (str): Task requirements description
-        
-    Returns:
-        Dict with difficulty assessment and reasoning
-    """
-    requirements_lower = requirements.lower()
-    
-    # Simple task indicators
-    simple_indicators = [
-        'function', 'calculate', 'add', 'subtract', 'multiply', 'divide',
-        'simple', 'basic', 'hello world', 'print', 'variable'
-    ]
-    
-    # Medium task indicators  
-    medium_indicators = [
-        'class', 'object', 'method', 'api', 'file', 'data processing',
-        'validation', 'parsing', 'algorithm', 'sorting', 'searching'
-    ]
-    
-    # Complex task indicators
-    complex_indicators = [
-        'microservice', 'database', 'distributed', 'concurrent', 'async',
-        'security', 'authentication', 'encryption', 'performance', 
-        'optimization', 'architecture', 'integration', 'scalability'
-    ]
-    
-    simple_count = sum(1 for indicator in simple_indicators if indicator in requirements_lower)
-    medium_count = sum(1 for indicator in medium_indicators if indicator in requirements_lower)
-    complex_count = sum(1 for indicator in complex_indicators if indicator in requirements_lower)
+# Task indicators for assess_task_difficulty (matched as lower-case substrings)
+SIMPLE_TASK_INDICATORS = (
+    'function', 'calculate', 'add', 'subtract', 'multiply', 'divide',
+    'simple', 'basic', 'hello world', 'print', 'variable'
+)
+
+MEDIUM_TASK_INDICATORS = (
+    'class', 'object', 'method', 'api', 'file', 'data processing',
+    'validation', 'parsing', 'algorithm', 'sorting', 'searching'
+)
+
+COMPLEX_TASK_INDICATORS = (
+    'microservice', 'database', 'distributed', 'concurrent', 'async',
+    'security', 'authentication', 'encryption', 'performance', 
+    'optimization', 'architecture', 'integration', 'scalability'
+)
+
+
+@lru_cache(maxsize=1024)
+def _assess_requirements(requirements_lower: str) -> Dict[str, Any]:
+    """Body of assess_task_difficulty, keyed on the stripped, lower-cased text"""
+    # Tiers are checked from most to least complex, so each later tier is
+    # only scanned when the earlier ones did not already decide the outcome
+    complex_found = [i for i in COMPLEX_TASK_INDICATORS if i in requirements_lower]
+    medium_found = [] if complex_found else [i for i in MEDIUM_TASK_INDICATORS if i in requirements_lower]
     
     # Determine difficulty
-    if complex_count > 0:
+    if complex_found:
         difficulty = "Complex"
         ai_confidence = "Low"
-        reasoning = f"Task contains complex indicators: {[i for i in complex_indicators if i in requirements_lower]}"
-    elif medium_count > 1:
+        reasoning = f"Task contains complex indicators: {complex_found}"
+    elif len(medium_found) > 1:
         difficulty = "Medium"
         ai_confidence = "Medium"
-        reasoning = f"Task has multiple medium complexity indicators: {[i for i in medium_indicators if i in requirements_lower]}"
-    elif simple_count > 0 or len(requirements.split()) < 20:
+        reasoning = f"Task has multiple medium complexity indicators: {medium_found}"
+    elif len(requirements_lower.split()) < 20 or any(i in requirements_lower for i in SIMPLE_TASK_INDICATORS):
         difficulty = "Simple"
         ai_confidence = "High" 
         reasoning = "Task appears straightforward with simple requirements"
@@ -314,4 +340,21 @@ def assess_task_difficulty(requirements: str) -> Dict[str, Any]:
             "Complex": 45
         }[difficulty],
         "requires_human": difficulty == "Complex"
-    }
\ No newline at end of file
+    }
+
+
+@tool 
+def assess_task_difficulty(requirements: str) -> Dict[str, Any]:
+    """
+    Assess the difficulty level of a development task.
+    
+    Args:
+        requirements (str): Task requirements description
+        
+    Returns:
+        Dict with difficulty assessment and reasoning
+    """
+    # The assessment only depends on the stripped, lower-cased text, and
+    # agents tend to re-assess the same task; copy so the cached dict is
+    # never handed out for mutation
+    return dict(_assess_requirements(requirements.strip().lower()))
\ No newline at end of file
@@ -3,10 +3,24 @@ Testing and quality assurance tools
 """
 
 from typing import Dict, Any, List
+import importlib.util
 import subprocess
+import sys
 import tempfile
 import os
 
+# Temp files for generated code go to tmpfs where available, so writing and
+# then running a snippet never touches disk (None: tempfile's default)
+SCRATCH_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# pytest command for generated tests. Plugin autoloading is disabled in
+# run_tests (scanning every installed package for entry points is most of
+# pytest's startup), so plugins that generated tests rely on are loaded
+# explicitly when installed: pytest-asyncio for async def tests.
+_PYTEST_ARGS = ['-v', '--tb=short', '-p', 'no:cacheprovider']
+if importlib.util.find_spec('pytest_asyncio') is not None:
+    _PYTEST_ARGS += ['-p', 'pytest_asyncio.plugin']
+
 
 def run_tests(test_code: str, test_file_name: str = "test_temp.py") -> Dict[str, Any]:
     """
@@ -19,22 +33,26 @@ def run_tests(test_code: str, test_file_name: str = "test_temp.py") -> Dict[str,
     Returns:
         Test execution results
     """
+    temp_file = None
     try:
         # Create temporary test file
         with tempfile.NamedTemporaryFile(
             mode='w',
             suffix='.py',
+            dir=SCRATCH_DIR,
             delete=False
         ) as f:
             f.write(test_code)
             temp_file = f.name
         
-        # Run pytest on the file
+        # Run pytest on the file in a separate interpreter, so generated code
+        # cannot exit, hang or leak state into this process
         result = subprocess.run(
-            ['pytest', temp_file, '-v', '--tb=short'],
+            [sys.executable, '-m', 'pytest', temp_file, *_PYTEST_ARGS],
             capture_output=True,
             text=True,
-            timeout=30
+            timeout=30,
+            env={**os.environ, 'PYTEST_DISABLE_PLUGIN_AUTOLOAD': '1'}
         )
         
         # Parse output
@@ -42,9 +60,6 @@ def run_tests(test_code: str, test_file_name: str = "test_temp.py") -> Dict[str,
         passed = output.count(' PASSED')
         failed = output.count(' FAILED')
         
-        # Cleanup
-        os.unlink(temp_file)
-        
         return {
             "success": result.returncode == 0,
             "passed": passed,
@@ -69,6 +84,10 @@ def run_tests(test_code: str, test_file_name: str = "test_temp.py") -> Dict[str,
             "output": f"Error running tests: {str(e)}",
             "return_code": -1
         }
+    finally:
+        # Cleanup
+        if temp_file is not None and os.path.exists(temp_file):
+            os.unlink(temp_file)
 
 
 def calculate_coverage(source_code: str, test_code: str) -> Dict[str, Any]:
@@ -125,11 +144,11 @@ def lint_code(code: str, language: str = "python") -> Dict[str, List[str]]:
             issues["style"].append(f"Line {i}: Exceeds 100 characters")
         
         # Trailing whitespace
-        if line.endswith(' ') or line.endswith('\t'):
+        if line.endswith((' ', '\t')):
             issues["style"].append(f"Line {i}: Trailing whitespace")
         
         # Multiple statements on one line
-        if ';' in line and not line.strip().startswith('#'):
+        if ';' in line and not line.lstrip().startswith('#'):
             issues["warnings"].append(f"Line {i}: Multiple statements on one line")
     
     # Check for missing docstrings
@@ -6,14 +6,29 @@ Run AI agents to solve development tasks
 
 import sys
 import argparse
+import codecs
+import json
+import os
 import time
-from typing import Optional
-from agents.swarm_orchestrator import CodeCollabSwarm
+import atexit
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+from agents.task_cache import TaskCache, mark_cache_hit
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+if TYPE_CHECKING:
+    from agents.swarm_orchestrator import CodeCollabSwarm
+
 # Load environment variables
 load_dotenv()
 
+# Results of tasks already run this session (interactive mode repeats)
+_task_cache = TaskCache()
+
 
 class Colors:
     """Terminal colors for better output"""
@@ -28,9 +43,26 @@ class Colors:
     UNDERLINE = '\033[4m'
 
 
-def print_banner():
-    """Print application banner"""
-    banner = f"""
+# Marker for "key not present" when resolving result field aliases
+_MISSING = object()
+
+# Static output, with colors interpolated once at import rather than on
+# every call
+_CYAN_RULE = f"{Colors.CYAN}{'─'*80}{Colors.ENDC}\n"
+_BLUE_RULE = f"{Colors.BLUE}{'─'*80}{Colors.ENDC}\n"
+_YELLOW_RULE = f"{Colors.YELLOW}{'─'*80}{Colors.ENDC}\n"
+
+_RESULT_TITLE = f"{Colors.BOLD}📊 EXECUTION RESULT{Colors.ENDC}\n"
+_CODE_TITLE = f"\n{Colors.BOLD}📋 GENERATED CODE:{Colors.ENDC}\n"
+
+# Generated code longer than this many characters is cut in print_result
+_CODE_DISPLAY_LIMIT = 2000
+_TRUNCATED_NOTE = (
+    f"\n\n{Colors.YELLOW}... (output truncated, showing first "
+    f"{_CODE_DISPLAY_LIMIT} chars){Colors.ENDC}\n"
+)
+
+_BANNER = f"""
 {Colors.CYAN}{'='*80}
 {Colors.BOLD}                    🤖 CodeCollab Swarm Orchestrator 🤖{Colors.ENDC}
 {Colors.CYAN}{'='*80}{Colors.ENDC}
@@ -41,89 +73,200 @@ def print_banner():
   4. ✅ Quality Agent      - Verifies and tests implementation
   5. 🎯 Escalation Agent   - Decides completion or human handoff
 {Colors.CYAN}{'='*80}{Colors.ENDC}
+
+"""
+
+_HELP_TEXT = f"""
+{Colors.CYAN}📚 EXAMPLE TASKS:{Colors.ENDC}
+
+{Colors.BOLD}Simple Tasks:{Colors.ENDC}
+  • Create a function to calculate factorial
+  • Write a class for managing a todo list
+  • Fix the bug in the login function
+  • Add input validation to the user registration
+
+{Colors.BOLD}Medium Tasks:{Colors.ENDC}
+  • Create a REST API endpoint for user authentication
+  • Implement a binary search tree with insertion and deletion
+  • Write a function to parse and validate email addresses
+  • Add caching to the database query function
+
+{Colors.BOLD}Complex Tasks:{Colors.ENDC}
+  • Design a microservice for payment processing
+  • Refactor the monolithic application into modules
+  • Implement real-time chat with WebSocket
+  • Create a CI/CD pipeline for automated deployment
+
+{Colors.YELLOW}Tip: Be specific about requirements for better results!{Colors.ENDC}
+
+"""
+
+# The emoji-heavy blocks, encoded once for stdout's binary buffer
+_BANNER_B = _BANNER.encode('utf-8')
+_HELP_TEXT_B = _HELP_TEXT.encode('utf-8')
+
+
+def _write_static(text: str, data: bytes):
     """
-    print(banner)
+    Write a constant block whose UTF-8 encoding is precomputed
+
+    Goes straight to sys.stdout.buffer when stdout is a UTF-8 text stream
+    over a binary buffer, skipping the per-write encode; otherwise (e.g. a
+    replaced or non-UTF-8 stdout) falls back to a normal text write.
+    """
+    buffer = getattr(sys.stdout, 'buffer', None)
+    encoding = getattr(sys.stdout, 'encoding', None)
+    if buffer is None or not encoding or codecs.lookup(encoding).name != 'utf-8':
+        sys.stdout.write(text)
+        return
+    # Flush pending text first so output stays in order
+    sys.stdout.flush()
+    buffer.write(data)
+    buffer.flush()
+
+
+def print_banner():
+    """Print application banner"""
+    _write_static(_BANNER, _BANNER_B)
 
 
 def print_task_header(task: str):
     """Print task header"""
-    print(f"\n{Colors.BLUE}{'─'*80}{Colors.ENDC}")
-    print(f"{Colors.BOLD}📝 TASK:{Colors.ENDC} {task}")
-    print(f"{Colors.BLUE}{'─'*80}{Colors.ENDC}\n")
+    sys.stdout.write(
+        f"\n{_BLUE_RULE}"
+        f"{Colors.BOLD}📝 TASK:{Colors.ENDC} {task}\n"
+        f"{_BLUE_RULE}\n"
+    )
 
 
-def print_agent_flow(agents: list):
-    """Print agent handoff flow"""
+def _format_agent_flow(agents: list) -> str:
+    """Agent handoff flow lines, or an empty string for no agents"""
     if not agents:
-        return
+        return ""
 
-    print(f"\n{Colors.GREEN}🔀 AGENT FLOW ({len(agents)} agents):{Colors.ENDC}")
+    lines = [f"\n{Colors.GREEN}🔀 AGENT FLOW ({len(agents)} agents):{Colors.ENDC}\n"]
     for i, agent in enumerate(agents, 1):
         if i < len(agents):
-            print(f"   {i}. {agent} → ")
+            lines.append(f"   {i}. {agent} → \n")
         else:
-            print(f"   {i}. {agent} ✓")
+            lines.append(f"   {i}. {agent} ✓\n")
+    return "".join(lines)
+
+
+def print_agent_flow(agents: list):
+    """Print agent handoff flow"""
+    sys.stdout.write(_format_agent_flow(agents))
+
+
+class _ResultSummary(NamedTuple):
+    """The fields print_result shows, resolved from a swarm result once"""
+    success: bool
+    exec_ms: float
+    tokens: int
+    agents: list
+    decision: str
+    code: Any
+
+
+def _get_either(result: dict, key: str, fallback_key: str, default: Any) -> Any:
+    """result[key] if present, else result[fallback_key], else default"""
+    value = result.get(key, _MISSING)
+    if value is _MISSING:
+        return result.get(fallback_key, default)
+    return value
+
+
+def _normalize_result(result: dict) -> _ResultSummary:
+    """
+    Resolve the field aliases used by the swarm, pipeline and mock results
+
+    Each field is looked up once; the fallback key is only consulted when
+    the primary key is missing.
+    """
+    # Try to get code first, then final_result
+    code = _get_either(result, 'code', 'final_result', 'No result available')
+
+    # If it's a dict (from mock), extract the actual result
+    if isinstance(code, dict):
+        code = code.get('code', code.get('final_result', str(code)))
+
+    return _ResultSummary(
+        success=result.get('success', False),
+        exec_ms=_get_either(result, 'execution_time_ms', 'latency_ms', 0),
+        tokens=_get_either(result, 'tokens_used', 'total_tokens', 0),
+        agents=result.get('agent_sequence', []),
+        decision=_get_either(result, 'final_decision', 'decision', ''),
+        code=code
+    )
 
 
 def print_result(result: dict):
     """Print execution result"""
-    print(f"\n{Colors.CYAN}{'─'*80}{Colors.ENDC}")
-    print(f"{Colors.BOLD}📊 EXECUTION RESULT{Colors.ENDC}")
-    print(f"{Colors.CYAN}{'─'*80}{Colors.ENDC}")
+    summary = _normalize_result(result)
+
+    # Collected and written in one call rather than one print() per line
+    out = [
+        "\n" + _CYAN_RULE,
+        _RESULT_TITLE,
+        _CYAN_RULE
+    ]
 
     # Success status
-    success = result.get('success', False)
-    status_color = Colors.GREEN if success else Colors.RED
-    status_icon = "✅" if success else "❌"
-    print(f"{status_icon} Status: {status_color}{'SUCCESS' if success else 'FAILED'}{Colors.ENDC}")
+    if summary.success:
+        out.append(f"✅ Status: {Colors.GREEN}SUCCESS{Colors.ENDC}\n")
+    else:
+        out.append(f"❌ Status: {Colors.RED}FAILED{Colors.ENDC}\n")
 
     # Timing
-    exec_time = result.get('execution_time_ms', result.get('latency_ms', 0)) / 1000
-    print(f"⏱️  Time: {exec_time:.2f} seconds")
+    out.append(f"⏱️  Time: {summary.exec_ms / 1000:.2f} seconds\n")
 
     # Tokens
-    tokens = result.get('tokens_used', result.get('total_tokens', 0))
-    if tokens:
-        print(f"🎫 Tokens: {tokens}")
+    if summary.tokens:
+        out.append(f"🎫 Tokens: {summary.tokens}\n")
 
     # Agent sequence
-    agents = result.get('agent_sequence', [])
-    if agents:
-        print_agent_flow(agents)
+    if summary.agents:
+        out.append(_format_agent_flow(summary.agents))
 
     # Decision
-    decision = result.get('final_decision', result.get('decision', ''))
+    decision = summary.decision
     if decision:
         decision_color = Colors.GREEN if decision == 'COMPLETE' else Colors.YELLOW
-        print(f"\n🎯 Decision: {decision_color}{decision}{Colors.ENDC}")
+        out.append(f"\n🎯 Decision: {decision_color}{decision}{Colors.ENDC}\n")
 
     # Final result/code
-    print(f"\n{Colors.BOLD}📋 GENERATED CODE:{Colors.ENDC}")
-    print(f"{Colors.CYAN}{'─'*80}{Colors.ENDC}")
-
-    # Try to get code first, then final_result
-    code = result.get('code', result.get('final_result', 'No result available'))
-
-    # If it's a dict (from mock), extract the actual result
-    if isinstance(code, dict):
-        code = code.get('code', code.get('final_result', str(code)))
+    out.append(_CODE_TITLE)
+    out.append(_CYAN_RULE)
 
     # Format code nicely
+    code = summary.code
     if isinstance(code, str) and code.strip():
-        # Truncate if too long
-        if len(code) > 2000:
-            print(code[:2000])
-            print(f"\n{Colors.YELLOW}... (output truncated, showing first 2000 chars){Colors.ENDC}")
+        # Truncate if too long. The code goes into the list as-is (or as
+        # one slice) rather than concatenated with its newline, so it is
+        # copied only once, by the final join
+        if len(code) > _CODE_DISPLAY_LIMIT:
+            out.append(code[:_CODE_DISPLAY_LIMIT])
+            out.append(_TRUNCATED_NOTE)
         else:
-            print(code)
+            out.append(code)
+            out.append("\n")
     else:
-        print("No code generated")
+        out.append("No code generated\n")
+
+    out.append(_CYAN_RULE)
+    sys.stdout.write("".join(out))
 
-    print(f"{Colors.CYAN}{'─'*80}{Colors.ENDC}")
 
+def process_task(swarm: "CodeCollabSwarm", task: str, verbose: bool = False):
+    """
+    Process a single task
 
-def process_task(swarm: CodeCollabSwarm, task: str):
-    """Process a single task"""
+    Args:
+        swarm: Swarm orchestrator to run the task
+        task: Development task description
+        verbose: Also collect per-agent detail (agent_outputs,
+            shared_knowledge, quality_metrics), e.g. for --json output
+    """
     print_task_header(task)
 
     print(f"{Colors.YELLOW}🔄 Processing with swarm agents...{Colors.ENDC}\n")
@@ -132,8 +275,16 @@ def process_task(swarm: CodeCollabSwarm, task: str):
         # Start timer
         start = time.time()
 
-        # Process task
-        result = swarm.process_task(task)
+        # Process task, reusing the result if the same task was already run
+        # with the same level of detail
+        cache_key = f"verbose:{task}" if verbose else task
+        result = _task_cache.get(cache_key)
+        if result is None:
+            result = swarm.process_task(task, verbose=verbose)
+            _task_cache.put(cache_key, result)
+        else:
+            # Report this lookup's time and don't charge for the same work twice
+            mark_cache_hit(result, (time.time() - start) * 1000)
 
         # Calculate time if not in result
         if 'execution_time_ms' not in result:
@@ -149,17 +300,89 @@ def process_task(swarm: CodeCollabSwarm, task: str):
         return {"success": False, "error": str(e)}
 
 
-def interactive_mode(swarm: CodeCollabSwarm):
+def print_json(result: dict):
+    """
+    Print a result as JSON: indented for a terminal, compact when piped
+
+    Compact output skips the pretty-printer and, with orjson installed,
+    is encoded straight to UTF-8 bytes.
+    """
+    if sys.stdout.isatty():
+        sys.stdout.write("\n" + json.dumps(result, indent=2) + "\n")
+        return
+
+    if orjson is not None:
+        data = orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(result, separators=(',', ':')).encode('utf-8')
+
+    buffer = getattr(sys.stdout, 'buffer', None)
+    if buffer is None:
+        sys.stdout.write("\n" + data.decode('utf-8') + "\n")
+        return
+    sys.stdout.flush()
+    buffer.write(b"\n" + data + b"\n")
+    buffer.flush()
+
+
+# Interactive-mode input history, kept across sessions
+_HISTORY_FILE = os.path.expanduser('~/.codecollab_history')
+_HISTORY_LENGTH = 100
+
+
+def _enable_line_editing() -> bool:
+    """
+    Back input() with readline (line editing and persistent history)
+
+    Returns:
+        False when stdin is not a terminal or readline is unavailable
+        (e.g. Windows)
+    """
+    if not sys.stdin.isatty():
+        return False
+    try:
+        import readline
+    except ImportError:
+        return False
+
+    readline.set_history_length(_HISTORY_LENGTH)
+    try:
+        readline.read_history_file(_HISTORY_FILE)
+    except OSError:
+        pass  # first run, or history not readable
+    atexit.register(_save_history, readline)
+    return True
+
+
+def _save_history(readline):
+    try:
+        readline.write_history_file(_HISTORY_FILE)
+    except OSError:
+        pass
+
+
+def interactive_mode(swarm: "CodeCollabSwarm"):
     """Run in interactive mode"""
-    print(f"\n{Colors.GREEN}🎮 INTERACTIVE MODE{Colors.ENDC}")
-    print("Enter your development tasks. Type 'exit' or 'quit' to stop.")
-    print("Type 'help' for example tasks.\n")
+    # readline needs the prompt's color codes wrapped in \001/\002 to
+    # compute the cursor position
+    if _enable_line_editing():
+        prompt = f"\001{Colors.BOLD}\002Enter task > \001{Colors.ENDC}\002"
+    else:
+        prompt = f"{Colors.BOLD}Enter task > {Colors.ENDC}"
+
+    sys.stdout.write(
+        f"\n{Colors.GREEN}🎮 INTERACTIVE MODE{Colors.ENDC}\n"
+        "Enter your development tasks. Type 'exit' or 'quit' to stop.\n"
+        "Type 'help' for example tasks.\n\n"
+    )
 
     while True:
         try:
-            # Get user input
-            print(f"{Colors.YELLOW}{'─'*80}{Colors.ENDC}")
-            task = input(f"{Colors.BOLD}Enter task > {Colors.ENDC}").strip()
+            # Get user input. The separator is one newline-terminated write,
+            # so a line-buffered TTY shows it immediately; input() flushes
+            # stdout before the prompt in any case
+            sys.stdout.write(_YELLOW_RULE)
+            task = input(prompt).strip()
 
             # Check for exit
             if task.lower() in ['exit', 'quit', 'q']:
@@ -175,15 +398,12 @@ def interactive_mode(swarm: CodeCollabSwarm):
             if not task:
                 continue
 
-            # Process the task
+            # Process the task, then go straight back to the prompt
             process_task(swarm, task)
 
-            # Ask if user wants to continue
-            print(f"\n{Colors.YELLOW}Press Enter to continue or type 'exit' to quit...{Colors.ENDC}")
-            if input().lower() in ['exit', 'quit', 'q']:
-                print(f"\n{Colors.CYAN}👋 Goodbye!{Colors.ENDC}")
-                break
-
+        except EOFError:
+            print(f"\n{Colors.CYAN}👋 Goodbye!{Colors.ENDC}")
+            break
         except KeyboardInterrupt:
             print(f"\n\n{Colors.CYAN}👋 Interrupted. Goodbye!{Colors.ENDC}")
             break
@@ -193,30 +413,7 @@ def interactive_mode(swarm: CodeCollabSwarm):
 
 def print_help():
     """Print help with example tasks"""
-    help_text = f"""
-{Colors.CYAN}📚 EXAMPLE TASKS:{Colors.ENDC}
-
-{Colors.BOLD}Simple Tasks:{Colors.ENDC}
-  • Create a function to calculate factorial
-  • Write a class for managing a todo list
-  • Fix the bug in the login function
-  • Add input validation to the user registration
-
-{Colors.BOLD}Medium Tasks:{Colors.ENDC}
-  • Create a REST API endpoint for user authentication
-  • Implement a binary search tree with insertion and deletion
-  • Write a function to parse and validate email addresses
-  • Add caching to the database query function
-
-{Colors.BOLD}Complex Tasks:{Colors.ENDC}
-  • Design a microservice for payment processing
-  • Refactor the monolithic application into modules
-  • Implement real-time chat with WebSocket
-  • Create a CI/CD pipeline for automated deployment
-
-{Colors.YELLOW}Tip: Be specific about requirements for better results!{Colors.ENDC}
-    """
-    print(help_text)
+    _write_static(_HELP_TEXT, _HELP_TEXT_B)
 
 
 def main():
@@ -247,9 +444,11 @@ def main():
     if not args.no_banner:
         print_banner()
 
-    # Initialize swarm
+    # Initialize swarm; the agent stack is imported here rather than at
+    # module load so --help and argument errors return immediately
     print(f"{Colors.YELLOW}📦 Initializing swarm agents...{Colors.ENDC}")
     try:
+        from agents.swarm_orchestrator import CodeCollabSwarm
         swarm = CodeCollabSwarm()
         print(f"{Colors.GREEN}✅ Swarm ready!{Colors.ENDC}\n")
     except Exception as e:
@@ -259,12 +458,12 @@ def main():
     # Process based on mode
     if args.task:
         # Single task mode
-        result = process_task(swarm, args.task)
+        # --json dumps the whole result, so collect the per-agent detail too
+        result = process_task(swarm, args.task, verbose=args.json)
 
         # Output as JSON if requested
         if args.json:
-            import json
-            print("\n" + json.dumps(result, indent=2))
+            print_json(result)
     else:
         # Interactive mode
         interactive_mode(swarm)
@@ -4,39 +4,129 @@ Simple HTTP API server for CodeCollab Swarm UI (no external dependencies)
 Uses only Python standard library
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import json
 import sys
 import os
-from urllib.parse import urlparse, parse_qs
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+
+def _dumps(data):
+    """Encode a response body as UTF-8 JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data).encode('utf-8')
+
+
+def _loads(body):
+    """Decode a UTF-8 JSON request body straight from bytes"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from agents.swarm_orchestrator import CodeCollabSwarm
-
-# Initialize swarm
-try:
-    swarm = CodeCollabSwarm()
-    print("✅ Swarm orchestrator initialized")
-except Exception as e:
-    print(f"⚠️ Using mock swarm: {e}")
-    swarm = None
-
-# Task history
-task_history = []
+from agents.task_cache import TaskCache, mark_cache_hit
+
+# Swarm orchestrator, built on first use (see _get_swarm); None until then
+# and in mock mode
+swarm = None
+_swarm_loaded = False
+_swarm_init_lock = threading.Lock()
+
+
+def _get_swarm():
+    """
+    Return the shared swarm, importing and constructing it on first call
+
+    The agent stack takes about a second to import, so it is kept off the
+    startup path. Returns None (mock mode) if the swarm cannot be created.
+    """
+    global swarm, _swarm_loaded
+    if not _swarm_loaded:
+        with _swarm_init_lock:
+            if not _swarm_loaded:
+                try:
+                    from agents.swarm_orchestrator import CodeCollabSwarm
+                    swarm = CodeCollabSwarm()
+                    print("✅ Swarm orchestrator initialized")
+                except Exception as e:
+                    print(f"⚠️ Using mock swarm: {e}")
+                    swarm = None
+                _swarm_loaded = True
+    return swarm
+
+
+# The swarm's agents keep per-call conversation state, so tasks run one at a
+# time; requests are served on worker threads so health and history stay
+# responsive while a task is in progress
+_swarm_lock = threading.Lock()
+
+# Largest request body read into memory; bigger requests are rejected
+_MAX_BODY_BYTES = 1024 * 1024
+
+# Stable opening of every task prompt sent to the swarm
+_TASK_PREFIX = "You are processing a development task.\n\n"
+
+# Keywords that make the mock (no swarm) response escalate
+_MOCK_COMPLEX_KEYWORDS = ('microservice', 'architecture', 'distributed')
+
+# Results of earlier identical tasks, served without calling the swarm
+task_cache = TaskCache()
+
+# Task history, newest last; appends, clears and copies are atomic, so the
+# request threads share it without a lock
+task_history = deque(maxlen=50)
+
+# Static responses, serialized once at startup
+AGENTS = [
+    {"name": "RequirementsAgent", "icon": "📋", "description": "Analyzes and structures requirements", "status": "ready"},
+    {"name": "ContextAgent", "icon": "🔍", "description": "Understands codebase and patterns", "status": "ready"},
+    {"name": "BuilderAgent", "icon": "🔨", "description": "Writes production-quality code", "status": "ready"},
+    {"name": "QualityAgent", "icon": "✅", "description": "Verifies and tests implementation", "status": "ready"},
+    {"name": "EscalationAgent", "icon": "🎯", "description": "Decides completion or human handoff", "status": "ready"}
+]
+_AGENTS_JSON = _dumps(AGENTS)
+_ROOT_JSON = _dumps({
+    "service": "CodeCollab Swarm API",
+    "version": "1.0.0",
+    "status": "online"
+})
+_NOT_FOUND_JSON = _dumps({"error": "Not found"})
+_BAD_LENGTH_JSON = _dumps({"error": "Invalid Content-Length"})
+_TOO_LARGE_JSON = _dumps({"error": "Request body too large"})
 
 class SwarmAPIHandler(BaseHTTPRequestHandler):
     """Simple HTTP handler for Swarm API"""
 
-    def _set_headers(self, status=200, content_type='application/json'):
+    # Keep connections open between requests (every response sets
+    # Content-Length); idle connections are dropped after a minute
+    protocol_version = "HTTP/1.1"
+    timeout = 60
+
+    # Buffer writes so headers and body leave in one send; the base
+    # handler flushes after each request
+    wbufsize = -1
+
+    def _set_headers(self, status=200, content_type='application/json', content_length=None):
         """Set response headers"""
         self.send_response(status)
         self.send_header('Content-Type', content_type)
+        if content_length is not None:
+            self.send_header('Content-Length', str(content_length))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
@@ -44,141 +134,194 @@ class SwarmAPIHandler(BaseHTTPRequestHandler):
 
     def _send_json(self, data, status=200):
         """Send JSON response"""
-        self._set_headers(status)
-        self.wfile.write(json.dumps(data).encode('utf-8'))
+        self._send_precomputed(_dumps(data), status)
+
+    def _send_precomputed(self, payload, status=200):
+        """Send an already-encoded JSON response"""
+        self._set_headers(status, content_length=len(payload))
+        self.wfile.write(payload)
 
     def do_OPTIONS(self):
         """Handle CORS preflight"""
-        self._set_headers(200)
+        self._set_headers(200, content_length=0)
 
     def do_GET(self):
         """Handle GET requests"""
-        parsed_path = urlparse(self.path)
-
-        if parsed_path.path == '/':
-            self._send_json({
-                "service": "CodeCollab Swarm API",
-                "version": "1.0.0",
-                "status": "online"
-            })
-
-        elif parsed_path.path == '/api/health':
-            self._send_json({
-                "status": "healthy" if swarm else "degraded",
-                "swarm_available": swarm is not None,
-                "agents_count": 5,
-                "timestamp": "2024-10-11T12:00:00"
-            })
-
-        elif parsed_path.path == '/api/agents':
-            agents = [
-                {"name": "RequirementsAgent", "icon": "📋", "description": "Analyzes and structures requirements", "status": "ready"},
-                {"name": "ContextAgent", "icon": "🔍", "description": "Understands codebase and patterns", "status": "ready"},
-                {"name": "BuilderAgent", "icon": "🔨", "description": "Writes production-quality code", "status": "ready"},
-                {"name": "QualityAgent", "icon": "✅", "description": "Verifies and tests implementation", "status": "ready"},
-                {"name": "EscalationAgent", "icon": "🎯", "description": "Decides completion or human handoff", "status": "ready"}
-            ]
-            self._send_json(agents)
-
-        elif parsed_path.path == '/api/history':
-            self._send_json(task_history[-10:])
-
+        handler = self._GET_ROUTES.get(self.path.partition('?')[0])
+        if handler is None:
+            self._send_precomputed(_NOT_FOUND_JSON, 404)
         else:
-            self._send_json({"error": "Not found"}, 404)
+            handler(self)
 
     def do_POST(self):
         """Handle POST requests"""
-        parsed_path = urlparse(self.path)
-
-        if parsed_path.path == '/api/process':
-            # Read request body
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-
-            try:
-                data = json.loads(post_data)
-                task_description = data.get('task', '')
-                github_url = data.get('github_url', '')
-                requirements = data.get('requirements', '')
-
-                # Combine task description with GitHub URL if provided
-                full_task = task_description
-                if github_url:
-                    full_task += f"\n\nGitHub Repository: {github_url}"
-                if requirements:
-                    full_task += f"\n\nAdditional Requirements: {requirements}"
-
-                if swarm and task_description:
-                    # Process task with swarm (GitHub URL will be parsed by ContextAgent)
-                    result = swarm.process_task(full_task)
-
-                    # Build response
-                    response = {
-                        "success": result.get("success", False),
-                        "task_description": task_description,
-                        "github_url": github_url,
-                        "requirements": requirements,
-                        "agent_sequence": result.get("agent_sequence", [
-                            "RequirementsAgent", "ContextAgent",
-                            "BuilderAgent", "QualityAgent", "EscalationAgent"
-                        ]),
-                        "agent_outputs": result.get("agent_outputs"),
-                        "final_result": result.get("final_result"),
-                        "code": result.get("code"),
-                        "final_decision": result.get("final_decision", "COMPLETE"),
-                        "execution_time_ms": result.get("execution_time_ms", 2500),
-                        "tokens_used": result.get("tokens_used", 500),
-                        "payment": result.get("payment", {"amount": 0.05, "currency": "USD"})
-                    }
+        # Always consume the body so the next request on the connection
+        # starts at the right place; a body that cannot be read is refused
+        # and the connection closed instead
+        try:
+            content_length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            self.close_connection = True
+            self._send_precomputed(_BAD_LENGTH_JSON, 400)
+            return
+        if content_length > _MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_precomputed(_TOO_LARGE_JSON, 413)
+            return
+        post_data = self.rfile.read(content_length)
+
+        handler = self._POST_ROUTES.get(self.path.partition('?')[0])
+        if handler is None:
+            self._send_precomputed(_NOT_FOUND_JSON, 404)
+        else:
+            handler(self, post_data)
+
+    def _handle_root(self):
+        """GET / - service info"""
+        self._send_precomputed(_ROOT_JSON)
+
+    def _handle_health(self):
+        """GET /api/health - health check"""
+        self._send_json({
+            "status": "healthy" if swarm else "degraded",
+            "swarm_available": swarm is not None,
+            "agents_count": 5,
+            "timestamp": "2024-10-11T12:00:00"
+        })
+
+    def _handle_agents(self):
+        """GET /api/agents - list agents"""
+        self._send_precomputed(_AGENTS_JSON)
+
+    def _handle_history(self):
+        """GET /api/history - last 10 tasks"""
+        self._send_json(list(task_history)[-10:])
+
+    def _handle_process(self, post_data):
+        """POST /api/process - process a task"""
+        start = time.perf_counter()
+        try:
+            data = _loads(post_data)
+            task_description = data.get('task', '')
+            github_url = data.get('github_url', '')
+            requirements = data.get('requirements', '')
+
+            # Fixed preamble and field order first, free-form task last, so
+            # consecutive prompts share the longest possible prefix
+            full_task = (
+                f"{_TASK_PREFIX}"
+                f"GitHub Repository: {github_url or 'none'}\n"
+                f"Additional Requirements: {requirements or 'none'}\n\n"
+                f"Task: {task_description}"
+            )
+
+            swarm = _get_swarm()
+            if swarm and task_description:
+                # Process task with swarm (GitHub URL will be parsed by ContextAgent)
+                result = task_cache.get(full_task)
+                cached = result is not None
+                if not cached:
+                    with _swarm_lock:
+                        result = swarm.process_task(full_task, verbose=True)
+                    task_cache.put(full_task, result)
                 else:
-                    # Mock response
-                    is_complex = any(word in task_description.lower()
-                                    for word in ['microservice', 'architecture', 'distributed'])
-                    has_github = bool(github_url)
-
-                    response = {
-                        "success": True,
-                        "task_description": task_description,
-                        "github_url": github_url,
-                        "requirements": requirements,
-                        "agent_sequence": ["RequirementsAgent", "ContextAgent",
-                                         "BuilderAgent", "QualityAgent", "EscalationAgent"],
-                        "final_decision": "ESCALATE" if is_complex else "COMPLETE",
-                        "code": """def process_task(task: str) -> str:
+                    # Served without running the swarm: no new charge
+                    mark_cache_hit(result, int((time.perf_counter() - start) * 1000))
+
+                # Build response
+                response = {
+                    "success": result.get("success", False),
+                    "task_description": task_description,
+                    "github_url": github_url,
+                    "requirements": requirements,
+                    "agent_sequence": result.get("agent_sequence", [
+                        "RequirementsAgent", "ContextAgent",
+                        "BuilderAgent", "QualityAgent", "EscalationAgent"
+                    ]),
+                    "agent_outputs": result.get("agent_outputs"),
+                    "final_result": result.get("final_result"),
+                    "code": result.get("code"),
+                    "final_decision": result.get("final_decision", "COMPLETE"),
+                    "execution_time_ms": result.get("execution_time_ms", 2500),
+                    "tokens_used": result.get("tokens_used", 500),
+                    "payment": result.get("payment", {"amount": 0.05, "currency": "USD"})
+                }
+                if cached:
+                    response["cached"] = True
+            else:
+                # Mock response
+                task_lower = task_description.lower()
+                is_complex = any(word in task_lower for word in _MOCK_COMPLEX_KEYWORDS)
+                has_github = bool(github_url)
+
+                response = {
+                    "success": True,
+                    "task_description": task_description,
+                    "github_url": github_url,
+                    "requirements": requirements,
+                    "agent_sequence": ["RequirementsAgent", "ContextAgent",
+                                     "BuilderAgent", "QualityAgent", "EscalationAgent"],
+                    "final_decision": "ESCALATE" if is_complex else "COMPLETE",
+                    "code": """def process_task(task: str) -> str:
     \"\"\"Process the given task\"\"\"
     # Implementation here
     return f"Processed: {task}\"""" if not is_complex else None,
-                        "execution_time_ms": 2500,
-                        "tokens_used": 750,
-                        "github_analyzed": has_github
-                    }
-
-                # Store in history
-                task_history.append(response)
-                if len(task_history) > 50:
-                    task_history.pop(0)
-
-                self._send_json(response)
-
-            except Exception as e:
-                self._send_json({"error": str(e)}, 500)
-
-        elif parsed_path.path == '/api/clear':
-            task_history.clear()
-            self._send_json({"message": "History cleared", "success": True})
-
-        else:
-            self._send_json({"error": "Not found"}, 404)
+                    "execution_time_ms": 2500,
+                    "tokens_used": 750,
+                    "github_analyzed": has_github
+                }
+
+            # Store in history
+            task_history.append(response)
+
+            self._send_json(response)
+
+        except Exception as e:
+            self._send_json({"error": str(e)}, 500)
+
+    def _handle_clear(self, post_data):
+        """POST /api/clear - clear task history"""
+        task_history.clear()
+        self._send_json({"message": "History cleared", "success": True})
+
+    # Path -> handler dispatch tables; query strings are ignored
+    _GET_ROUTES = {
+        '/': _handle_root,
+        '/api/health': _handle_health,
+        '/api/agents': _handle_agents,
+        '/api/history': _handle_history
+    }
+    _POST_ROUTES = {
+        '/api/process': _handle_process,
+        '/api/clear': _handle_clear
+    }
+
+    def log_request(self, code='-', size='-'):
+        """Skip successful requests (health/history polling) before any formatting"""
+        if isinstance(code, int) and 200 <= code < 300:
+            return
+        super().log_request(code, size)
+
+    def log_error(self, format, *args):
+        """Skip idle keep-alive connections timing out; log other errors"""
+        if args and isinstance(args[0], TimeoutError):
+            return
+        super().log_error(format, *args)
 
     def log_message(self, format, *args):
-        """Override to reduce console output"""
-        if args[1] != '200':
-            print(f"{self.address_string()} - [{self.log_date_time_string()}] {format%args}")
+        """Log errors and non-2xx requests in a compact format"""
+        print(f"{self.address_string()} - [{self.log_date_time_string()}] {format%args}")
 
 def run_server(port=8000):
     """Run the HTTP server"""
     server_address = ('', port)
-    httpd = HTTPServer(server_address, SwarmAPIHandler)
+    httpd = ThreadingHTTPServer(server_address, SwarmAPIHandler)
+
+    # Build the swarm in the background; /api/health reports "degraded"
+    # until it is ready and the first /api/process waits for it
+    threading.Thread(target=_get_swarm, daemon=True).start()
 
     print(f"""
 ╔════════════════════════════════════════════╗
@@ -4,12 +4,54 @@ Test script to verify natural language task processing flow
 """
 
 from agents.swarm_orchestrator import CodeCollabSwarm
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from functools import lru_cache
 import json
+import threading
 
 # Load environment variables
 load_dotenv()
 
+
+def _report_case(number: int, test: dict, result: dict) -> dict:
+    """Print the outcome of one test case and return its summary row"""
+    print(f"\nTest {number}: {test['description']}")
+    print("-"*60)
+    print(f"Task: {test['task'][:80]}...")
+
+    # Check results
+    success = result.get('success', False)
+    decision = result.get('final_decision', 'UNKNOWN')
+    agents = result.get('agent_sequence', [])
+
+    print(f"✅ Success: {success}")
+    print(f"🎯 Decision: {decision}")
+    print(f"🔀 Agents involved: {len(agents)}")
+
+    # Verify agent outputs exist
+    if 'agent_outputs' in result:
+        print(f"📊 Agent outputs captured: {len(result['agent_outputs'])} agents")
+
+    # Check if code was generated (for non-escalated tasks)
+    if decision == 'COMPLETE' and result.get('code'):
+        print(f"✅ Code generated: {len(result['code'])} characters")
+
+    # Verify expected decision
+    if decision == test['expected_decision']:
+        print(f"✅ Decision matches expected: {decision}")
+    else:
+        print(f"⚠️ Decision mismatch! Expected: {test['expected_decision']}, Got: {decision}")
+
+    return {
+        "test": test['description'],
+        "success": success,
+        "decision": decision,
+        "expected": test['expected_decision'],
+        "match": decision == test['expected_decision']
+    }
+
+
 def test_natural_language_flow():
     """Test various natural language tasks through the swarm"""
 
@@ -21,6 +63,20 @@ def test_natural_language_flow():
     swarm = CodeCollabSwarm()
     print("✅ Swarm initialized successfully\n")
 
+    # A swarm's agents handle one task at a time, so each worker thread
+    # gets its own; the main thread keeps the one created above
+    local = threading.local()
+    local.swarm = swarm
+
+    # Caches finished tasks so later sequential calls reuse them; concurrent
+    # identical calls are not deduplicated here, the batch below does that
+    @lru_cache(maxsize=64)
+    def run_task(task: str) -> dict:
+        thread_swarm = getattr(local, 'swarm', None)
+        if thread_swarm is None:
+            thread_swarm = local.swarm = CodeCollabSwarm()
+        return thread_swarm.process_task(task, verbose=True)
+
     # Test cases with natural language descriptions
     test_cases = [
         {
@@ -50,46 +106,23 @@ def test_natural_language_flow():
         }
     ]
 
-    results = []
-
-    for i, test in enumerate(test_cases, 1):
-        print(f"\nTest {i}: {test['description']}")
-        print("-"*60)
-        print(f"Task: {test['task'][:80]}...")
-
-        # Process task
-        result = swarm.process_task(test['task'])
-
-        # Check results
-        success = result.get('success', False)
-        decision = result.get('final_decision', 'UNKNOWN')
-        agents = result.get('agent_sequence', [])
+    results = [None] * len(test_cases)
 
-        print(f"✅ Success: {success}")
-        print(f"🎯 Decision: {decision}")
-        print(f"🔀 Agents involved: {len(agents)}")
+    # Cases sharing the same task text run it once
+    indices_by_task = {}
+    for index, test in enumerate(test_cases):
+        indices_by_task.setdefault(test['task'], []).append(index)
 
-        # Verify agent outputs exist
-        if 'agent_outputs' in result:
-            print(f"📊 Agent outputs captured: {len(result['agent_outputs'])} agents")
-
-        # Check if code was generated (for non-escalated tasks)
-        if decision == 'COMPLETE' and result.get('code'):
-            print(f"✅ Code generated: {len(result['code'])} characters")
-
-        # Verify expected decision
-        if decision == test['expected_decision']:
-            print(f"✅ Decision matches expected: {decision}")
-        else:
-            print(f"⚠️ Decision mismatch! Expected: {test['expected_decision']}, Got: {decision}")
-
-        results.append({
-            "test": test['description'],
-            "success": success,
-            "decision": decision,
-            "expected": test['expected_decision'],
-            "match": decision == test['expected_decision']
-        })
+    # The cases are independent and mostly wait on LLM I/O, so run them
+    # concurrently and report each one as it finishes
+    with ThreadPoolExecutor(max_workers=len(indices_by_task)) as executor:
+        futures = {
+            executor.submit(run_task, task): indices
+            for task, indices in indices_by_task.items()
+        }
+        for future in as_completed(futures):
+            for index in futures[future]:
+                results[index] = _report_case(index + 1, test_cases[index], future.result())
 
     # Summary
     print("\n" + "="*80)
@@ -115,7 +148,7 @@ def test_natural_language_flow():
     print("="*80)
 
     task = "Create a function to validate email addresses"
-    result = swarm.process_task(task)
+    result = run_task(task)
 
     print(f"\nTask: {task}")
     print("\nAgent Sequence:")